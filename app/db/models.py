@@ -1,6 +1,6 @@
 import uuid
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import JSON, Boolean, Column, Integer, String, DateTime, ForeignKey, Index, Numeric, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -21,6 +21,13 @@ class Customer(Base):
     tax_number = Column(String, nullable=True)
     invoices = relationship("Invoice", back_populates="customer")
 
+    __table_args__ = (
+        Index("ix_customer_name_id", "name", "id"),  # Keyset-Pagination
+        Index("ix_customer_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_customer_vat_number_trgm", "vat_number",
+              postgresql_using="gin", postgresql_ops={"vat_number": "gin_trgm_ops"}),
+    )
+
 class Invoice(Base):
     __tablename__ = "invoice"
     id = Column(Integer, primary_key=True)
@@ -33,8 +40,19 @@ class Invoice(Base):
     gesamtbetrag = Column(Numeric, nullable=True)
     zielwaehrung = Column(String, nullable=False)
     status = Column(String, nullable=False, default="Entwurf")
+    schedule_id = Column(Integer, ForeignKey("invoice_schedule.id"), nullable=True)  # nur Serienrechnungen
     customer = relationship("Customer", back_populates="invoices")
-    positions = relationship("InvoicePosition", back_populates="invoice")
+    positions = relationship("InvoicePosition", back_populates="invoice", order_by="InvoicePosition.id")
+    snapshot = relationship("InvoiceSnapshot", back_populates="invoice", uselist=False)
+
+    __table_args__ = (
+        Index("ix_invoice_kunde_id_monat", "kunde_id", "monat"),
+        Index("ix_invoice_monat", "monat"),
+        Index("uq_invoice_nummer", "nummer", unique=True),
+        # je Serie höchstens eine Rechnung pro Periode; trägt auch den Anti-Join des Schedulers
+        Index("uq_invoice_schedule_id_monat", "schedule_id", "monat", unique=True,
+              postgresql_where=text("schedule_id IS NOT NULL"), sqlite_where=text("schedule_id IS NOT NULL")),
+    )
 
 class InvoicePosition(Base):
     __tablename__ = "invoice_position"
@@ -50,6 +68,10 @@ class InvoicePosition(Base):
     attachment_path = Column(String, nullable=True)
     invoice = relationship("Invoice", back_populates="positions")
 
+    __table_args__ = (
+        Index("ix_invoice_position_invoice_id", "invoice_id"),
+    )
+
 class ExchangeRate(Base):
     __tablename__ = "exchange_rate"
     id = Column(Integer, primary_key=True)
@@ -60,6 +82,10 @@ class ExchangeRate(Base):
     von = Column(String, nullable=False)
     nach = Column(String, nullable=False)
     kurs = Column(Numeric, nullable=False)
+
+    __table_args__ = (
+        Index("uq_exchange_rate_von_nach_datum", "von", "nach", "datum", unique=True),
+    )
 class PositionTemplate(Base):
     __tablename__ = "position_template"
 
@@ -74,3 +100,131 @@ class PositionTemplate(Base):
     einzelpreis = Column(Numeric, nullable=False)
     waehrung = Column(String, nullable=False, default="EUR")
     attachment_path = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_position_template_name_id", "name", "id"),  # Keyset-Pagination
+        Index("ix_position_template_name_trgm", "name",
+              postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
+class InvoiceNumberCounter(Base):
+    __tablename__ = "invoice_number_counter"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    serie = Column(String, unique=True, nullable=False)  # z.B. "fortlaufend" oder "2026"
+    letzte_nummer = Column(Integer, nullable=False, default=0)
+
+class RevenueSummary(Base):
+    """Umsatz je Kunde, Monat und Währung – wird beim Buchen von Rechnungen fortgeschrieben."""
+    __tablename__ = "revenue_summary"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    kunde_id = Column(Integer, ForeignKey("customer.id"), nullable=False)
+    monat = Column(String, nullable=False)  # "YYYY-MM" wie invoice.monat
+    zielwaehrung = Column(String, nullable=False)
+    anzahl_rechnungen = Column(Integer, nullable=False, default=0)
+    umsatz = Column(Numeric, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("uq_revenue_summary_kunde_monat_waehrung", "kunde_id", "monat", "zielwaehrung", unique=True),
+        Index("ix_revenue_summary_monat", "monat"),
+    )
+
+class InvoiceSnapshot(Base):
+    """Unveränderlicher Stand einer Rechnung beim Abschluss (Kunde, Positionen, Summen)."""
+    __tablename__ = "invoice_snapshot"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    invoice_id = Column(Integer, ForeignKey("invoice.id"), unique=True, nullable=False)
+    version = Column(Integer, nullable=False)  # Format des Dokuments
+    nummer = Column(String, nullable=False)
+    monat = Column(String, nullable=False)
+    dokument = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    invoice = relationship("Invoice", back_populates="snapshot")
+
+    __table_args__ = (
+        Index("uq_invoice_snapshot_nummer", "nummer", unique=True),
+        Index("ix_invoice_snapshot_monat", "monat"),
+    )
+
+class Job(Base):
+    """Auftrag für den Hintergrund-Worker (z.B. PDF-Erzeugung)."""
+    __tablename__ = "job"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    art = Column(String, nullable=False)  # z.B. "invoice_pdf"
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    status = Column(String, nullable=False, default="wartend")  # wartend, laeuft, erledigt, fehlgeschlagen
+    versuche = Column(Integer, nullable=False, default=0)
+    max_versuche = Column(Integer, nullable=False, default=3)
+    verfuegbar_ab = Column(DateTime(timezone=True), nullable=False)  # frühester (nächster) Start
+    gestartet_at = Column(DateTime(timezone=True), nullable=True)
+    beendet_at = Column(DateTime(timezone=True), nullable=True)
+    worker = Column(String, nullable=True)
+    ergebnis = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    fehler = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_status_verfuegbar_ab", "status", "verfuegbar_ab"),
+    )
+
+class InvoiceSchedule(Base):
+    """Serienrechnung: wiederkehrende Rechnung eines Kunden aus festen Positionsvorlagen."""
+    __tablename__ = "invoice_schedule"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    kunde_id = Column(Integer, ForeignKey("customer.id"), nullable=False)
+    name = Column(String, nullable=False)
+    intervall_monate = Column(Integer, nullable=False, default=1)  # 1 monatlich, 3 quartalsweise, 12 jährlich
+    start_monat = Column(String, nullable=False)  # "YYYY-MM", erste Periode
+    end_monat = Column(String, nullable=True)  # letzte Periode (inklusive); leer = unbefristet
+    # erste noch nicht sicher abgerechnete Periode – der Scheduler prüft erst ab hier
+    naechste_periode = Column(String, nullable=False)
+    aktiv = Column(Boolean, nullable=False, default=True)
+    customer = relationship("Customer")
+    positions = relationship("InvoiceSchedulePosition", back_populates="schedule",
+                             order_by="InvoiceSchedulePosition.id")
+
+    __table_args__ = (
+        Index("ix_invoice_schedule_kunde_id", "kunde_id"),
+    )
+
+class InvoiceSchedulePosition(Base):
+    """Position einer Serienrechnung; Menge/Preis überschreiben bei Bedarf die Vorlage."""
+    __tablename__ = "invoice_schedule_position"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    schedule_id = Column(Integer, ForeignKey("invoice_schedule.id"), nullable=False)
+    template_id = Column(Integer, ForeignKey("position_template.id"), nullable=False)
+    menge = Column(Numeric, nullable=True)  # leer = standard_menge der Vorlage
+    einzelpreis = Column(Numeric, nullable=True)  # leer = Preis der Vorlage
+    schedule = relationship("InvoiceSchedule", back_populates="positions")
+    template = relationship("PositionTemplate")
+
+    __table_args__ = (
+        Index("ix_invoice_schedule_position_schedule_id", "schedule_id"),
+    )
@@ -1,8 +1,162 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Pool-Einstellungen (Neon: Compute schläft nach ~5 min Leerlauf)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Verbindungen vor dem serverseitigen Idle-Timeout verwerfen
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))
+# "always": Ping bei jedem Checkout, "idle": nur nach DB_PRE_PING_IDLE_SECONDS Leerlauf, "off"
+PRE_PING = os.getenv("DB_PRE_PING", "idle")
+PRE_PING_IDLE_SECONDS = int(os.getenv("DB_PRE_PING_IDLE_SECONDS", "60"))
+# "pgbouncer": Transaktions-Pooler (Neon "-pooler"-Endpunkt) – keine Prepared Statements
+# "auto": anhand des Hostnamens erkennen
+POOLER = os.getenv("DB_POOLER", "auto")
+# Verbindungsaufbau ab dieser Dauer als Kaltstart (aufwachender Server) protokollieren
+COLD_START_SECONDS = float(os.getenv("DB_COLD_START_SECONDS", "1.0"))
+
+
+def _uses_pgbouncer(url) -> bool:
+    if POOLER == "auto":
+        return "-pooler" in (url.host or "")
+    return POOLER == "pgbouncer"
+
+
+def _engine_options(url) -> dict:
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": PRE_PING == "always",
+    }
+    if _uses_pgbouncer(url) and url.get_driver_name() == "psycopg":
+        # serverseitige Prepared Statements überleben keinen Verbindungswechsel im Pooler
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+def _install_idle_ping(engine):
+    """Pingt nur Verbindungen, die länger als PRE_PING_IDLE_SECONDS im Pool lagen."""
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < PRE_PING_IDLE_SECONDS:
+            return
+        start = time.perf_counter()
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            # Pool verwirft die Verbindung und baut eine neue auf
+            raise exc.DisconnectionError(f"Verbindung nach Leerlauf tot: {e}") from e
+        logger.debug("Pre-Ping nach Leerlauf: %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def _install_connect_timing(engine):
+    @event.listens_for(engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        connection = dialect.connect(*cargs, **cparams)
+        seconds = time.perf_counter() - start
+        if seconds >= COLD_START_SECONDS:
+            logger.warning("DB-Verbindungsaufbau %.2f s (Kaltstart/Aufwachen des Servers)", seconds)
+        else:
+            logger.info("DB-Verbindungsaufbau %.0f ms", seconds * 1000)
+        return connection
+
+
+def _create_engine(url: str):
+    parsed = make_url(url)
+    engine = create_engine(url, future=True, **_engine_options(parsed))
+    _install_connect_timing(engine)
+    if parsed.get_backend_name() != "sqlite" and PRE_PING == "idle":
+        _install_idle_ping(engine)
+    return engine
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Engine zu DATABASE_URL; wird beim ersten Zugriff angelegt, nicht beim Import.
+
+    So lädt der Import weder Dialekt noch Treiber (psycopg) – die erste
+    Streamlit-Seite baut sich auf, während warm_up_in_background verbindet.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(DATABASE_URL)
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker, der die Engine erst beim ersten Session-Aufbau bindet."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autoflush=False, autocommit=False)
+
+
+def __getattr__(name):
+    # `from app.db.session import engine` funktioniert weiter, legt die Engine aber sofort an
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+
+def warm_up_in_background(connections: int = 1):
+    """Öffnet beim App-Start im Hintergrund Verbindungen zum Aufwecken der Datenbank.
+
+    Die erste Seite wartet so nicht auf den Kaltstart. Mehrfache Aufrufe
+    (Streamlit-Reruns) sind wirkungslos.
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def _run():
+        start = time.perf_counter()
+        try:
+            engine = get_engine()
+            held = [engine.connect() for _ in range(max(1, min(connections, POOL_SIZE)))]
+            for conn in held:
+                conn.exec_driver_sql("SELECT 1")
+            for conn in held:
+                conn.close()  # zurück in den Pool, bleibt offen
+        except Exception:
+            logger.exception("DB-Warm-up fehlgeschlagen")
+            return
+        logger.info("DB-Warm-up: %d Verbindung(en) in %.2f s", len(held), time.perf_counter() - start)
+
+    threading.Thread(target=_run, name="db-warm-up", daemon=True).start()
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """Liefert ein INSERT mit ON CONFLICT-Unterstützung für das aktive Backend (Postgres/SQLite)."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upsert für Dialekt {name!r} nicht unterstützt")
@@ -1,10 +1,24 @@
+import io
 import streamlit as st
 from datetime import date
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, warm_up_in_background
 from app.db.models import Customer, PositionTemplate
 from app.services.invoice_service import create_invoice_with_positions
-from app.services.pdf_service import generate_invoice_pdf
+from app.services.revenue_service import revenue_rows
+from app.services.exchange_rate_service import ExchangeRateMissing
+from app.services import job_queue
+from app.services.instrumentation import trace
+from app.services.attachment_index import get_attachment_index
+from app.services.render_payload import invoice_file_path
+from app.services.reference_data import (
+    customers_changed,
+    list_customers,
+    list_position_templates,
+    page_customers,
+    page_position_templates,
+    position_templates_changed,
+)
 
 
 # ---------------------------------------------------
@@ -18,19 +32,52 @@ def _fmt_template(t: PositionTemplate) -> str:
     return f"{t.name} (ID {t.id})"
 
 
+def _unknown_attachments(paths) -> list[str]:
+    """Anhangspfade, die nicht im Anhangsordner liegen (Nachschlagen im Anhangsindex)."""
+    paths = [p for p in paths if p]
+    if not paths:
+        return []  # ohne Anhang den Index gar nicht erst anfassen
+    index = get_attachment_index()
+    return [p for p in paths if not index.exists(p)]
+
+
+def _page_cursor(key: str, search: str):
+    """Cursor-Stapel der Keyset-Pagination; eine neue Suche beginnt wieder auf Seite 1."""
+    state = st.session_state.setdefault(f"{key}_pager", {"search": search, "cursors": [None]})
+    if state["search"] != search:
+        state["search"] = search
+        state["cursors"] = [None]
+    return state["cursors"]
+
+
+def _page_controls(key: str, cursors: list, rows, has_next: bool):
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("◀ Zurück", disabled=len(cursors) == 1, key=f"{key}_prev"):
+        cursors.pop()
+        st.rerun()
+    col_info.caption(f"Seite {len(cursors)}")
+    if col_next.button("Weiter ▶", disabled=not has_next, key=f"{key}_next"):
+        cursors.append((rows[-1].name, rows[-1].id))
+        st.rerun()
+
+
 # ---------------------------------------------------
 # Kunden verwalten (Create / Update / Delete)
 # ---------------------------------------------------
 def manage_customers():
     st.title("👥 Kunden verwalten")
 
-    with SessionLocal() as db:
-        customers = db.query(Customer).order_by(Customer.name).all()
+    search = st.text_input("Suche (Name oder USt-IdNr.)", key="customer_search")
+    cursors = _page_cursor("customer", search)
+    customers, has_next = page_customers(search, cursors[-1])
 
     if customers:
         st.subheader("Vorhandene Kunden")
         for c in customers:
             st.write(f"**{c.name}** — {c.standard_currency} — ID {c.id}")
+        _page_controls("customer", cursors, customers, has_next)
+    elif search.strip():
+        st.info("Keine Kunden gefunden.")
     else:
         st.info("Noch keine Kunden vorhanden.")
 
@@ -65,6 +112,7 @@ def manage_customers():
             )
             db.add(c)
             db.commit()
+        customers_changed()
 
         st.success("Kunde wurde angelegt.")
         st.rerun()
@@ -108,6 +156,7 @@ def manage_customers():
             c.tax_number = (tax_number.strip() or None)
 
             db.commit()
+            customers_changed(selected_id)
             st.success("Kunde aktualisiert.")
             st.rerun()
 
@@ -118,6 +167,7 @@ def manage_customers():
             try:
                 db.delete(c)
                 db.commit()
+                customers_changed(selected_id)
                 st.success("Kunde gelöscht.")
                 st.rerun()
             except Exception as e:
@@ -131,13 +181,17 @@ def manage_customers():
 def manage_position_templates():
     st.title("🧩 Positionsvorlagen verwalten")
 
-    with SessionLocal() as db:
-        templates = db.query(PositionTemplate).order_by(PositionTemplate.name).all()
+    search = st.text_input("Suche (Name)", key="template_search")
+    cursors = _page_cursor("template", search)
+    templates, has_next = page_position_templates(search, cursors[-1])
 
     if templates:
         st.subheader("Vorhandene Vorlagen")
         for t in templates:
             st.write(f"**{t.name}** – {t.beschreibung}, {t.einzelpreis} {t.waehrung} — ID {t.id}")
+        _page_controls("template", cursors, templates, has_next)
+    elif search.strip():
+        st.info("Keine Vorlagen gefunden.")
     else:
         st.info("Es sind noch keine Positionsvorlagen angelegt.")
 
@@ -158,6 +212,9 @@ def manage_position_templates():
             st.error("Name und Beschreibung sind Pflichtfelder.")
             return
 
+        if _unknown_attachments([attachment_path.strip()]):
+            st.warning(f"Anhang „{attachment_path.strip()}“ ist im Anhangsordner (noch) nicht vorhanden.")
+
         with SessionLocal() as db:
             tmpl = PositionTemplate(
                 name=name.strip(),
@@ -169,6 +226,7 @@ def manage_position_templates():
             )
             db.add(tmpl)
             db.commit()
+        position_templates_changed()
 
         st.success("Positionsvorlage gespeichert.")
         st.rerun()
@@ -201,6 +259,9 @@ def manage_position_templates():
                 st.error("Name und Beschreibung sind Pflichtfelder.")
                 return
 
+            if _unknown_attachments([attachment_path.strip()]):
+                st.warning(f"Anhang „{attachment_path.strip()}“ ist im Anhangsordner (noch) nicht vorhanden.")
+
             t.name = name.strip()
             t.beschreibung = beschreibung.strip()
             t.standard_menge = standard_menge
@@ -208,6 +269,7 @@ def manage_position_templates():
             t.waehrung = (waehrung.strip() or "EUR")
             t.attachment_path = (attachment_path.strip() or None)
             db.commit()
+            position_templates_changed(selected_id)
             st.success("Vorlage aktualisiert.")
             st.rerun()
 
@@ -217,6 +279,7 @@ def manage_position_templates():
         if st.button("Vorlage löschen", disabled=not confirm, key=f"delete_template_{selected_id}"):
             db.delete(t)
             db.commit()
+            position_templates_changed(selected_id)
             st.success("Vorlage gelöscht.")
             st.rerun()
 
@@ -224,12 +287,207 @@ def manage_position_templates():
 # ---------------------------------------------------
 # Rechnung erstellen
 # ---------------------------------------------------
+_GRID_KEY = "pos_grid"
+_GRID_DATA = "pos_grid_data"
+_GRID_COLUMNS = ["vorlage", "beschreibung", "menge", "einzelpreis", "waehrung", "anhang"]
+_CURRENCY_PATTERN = r"^[A-Z]{3}$"
+
+
+def _template_label(t) -> str:
+    return f"{t.id}: {t.name}"
+
+
+def _empty_grid():
+    # pandas erst hier laden – nicht beim App-Start (scripts/check_import_time.py)
+    import pandas as pd
+
+    return pd.DataFrame(
+        [{"vorlage": None, "beschreibung": "", "menge": 1.0, "einzelpreis": 0.0, "waehrung": "EUR", "anhang": ""}],
+        columns=_GRID_COLUMNS,
+    )
+
+
+def _merge_grid_edits(df, edits: dict):
+    """Wendet die Änderungen des data_editor (edited/deleted/added_rows) auf die Basisdaten an."""
+    import pandas as pd
+
+    df = df.copy()
+    for row, changes in edits.get("edited_rows", {}).items():
+        for column, value in changes.items():
+            df.iat[int(row), df.columns.get_loc(column)] = value
+    df = df.drop(df.index[edits.get("deleted_rows", [])])
+    added = pd.DataFrame(edits.get("added_rows", []), columns=df.columns)
+    return pd.concat([df, added], ignore_index=True)
+
+
+def _apply_grid_templates(templates: list):
+    """on_change des Rasters: gewählte Vorlagen in ihre Zeile übernehmen.
+
+    Läuft vor dem Rerun – es braucht kein st.rerun(). Nur bei einer
+    Vorlagenwahl werden die Änderungen in die Basisdaten übernommen (neues
+    Raster); sonst bleiben sie Editor-Zustand und der Cursor im Raster.
+    """
+    edits = st.session_state[_GRID_KEY]
+    edited = edits.get("edited_rows", {})
+    added = edits.get("added_rows", [])
+    if not any(c.get("vorlage") for c in edited.values()) and not any(r.get("vorlage") for r in added):
+        return
+
+    # Zeilen mit neu gewählter Vorlage markieren, damit sie das Zusammenführen überstehen
+    flagged = {
+        **edits,
+        "edited_rows": {row: {**c, "_neu": bool(c.get("vorlage"))} for row, c in edited.items()},
+        "added_rows": [{**r, "_neu": bool(r.get("vorlage"))} for r in added],
+    }
+    df = _merge_grid_edits(st.session_state[_GRID_DATA].assign(_neu=False), flagged)
+    neu = df.pop("_neu").fillna(False).astype(bool)
+
+    by_label = {_template_label(t): t for t in templates}
+    vorlagen = df.loc[neu, "vorlage"].map(by_label).dropna()
+    rows = vorlagen.index
+    df.loc[rows, "beschreibung"] = [t.beschreibung for t in vorlagen]
+    df.loc[rows, "menge"] = [float(t.standard_menge) for t in vorlagen]
+    df.loc[rows, "einzelpreis"] = [float(t.einzelpreis) for t in vorlagen]
+    df.loc[rows, "waehrung"] = [t.waehrung for t in vorlagen]
+    df.loc[rows, "anhang"] = [t.attachment_path or "" for t in vorlagen]
+    st.session_state[_GRID_DATA] = df
+
+
+def _validate_positions(df) -> tuple[list[dict], list[str], object]:
+    """Prüft alle Zeilen und rechnet Zeilenbeträge in einem vektorisierten Durchgang.
+
+    Gibt (Positionen für create_invoice_with_positions, Fehlermeldungen,
+    Summen je Währung) zurück.
+    """
+    import pandas as pd
+
+    df = df.reset_index(drop=True)
+    beschreibung = df["beschreibung"].fillna("").astype(str).str.strip()
+    menge = pd.to_numeric(df["menge"], errors="coerce")
+    einzelpreis = pd.to_numeric(df["einzelpreis"], errors="coerce")
+    waehrung = df["waehrung"].fillna("").astype(str).str.strip().str.upper()
+    anhang = df["anhang"].fillna("").astype(str).str.strip()
+    betrag = menge * einzelpreis
+
+    fehler = []
+    for text, mask in (
+        ("Beschreibung fehlt", beschreibung == ""),
+        ("Menge ungültig", menge.isna()),
+        ("Einzelpreis ungültig", einzelpreis.isna()),
+        ("Währung ist kein ISO-Code", ~waehrung.str.match(_CURRENCY_PATTERN)),
+    ):
+        if mask.any():
+            zeilen = ", ".join(str(i + 1) for i in mask[mask].index[:10])
+            fehler.append(f"{text} (Zeile {zeilen}{' …' if mask.sum() > 10 else ''})")
+    if df.empty:
+        fehler.append("keine Positionen")
+
+    summen = (
+        pd.DataFrame({"Währung": waehrung, "Betrag": betrag})
+        .groupby("Währung", as_index=False)
+        .agg(Positionen=("Betrag", "size"), Summe=("Betrag", "sum"))
+    )
+    positionen = [
+        {"beschreibung": b, "menge": m, "einzelpreis": p, "waehrung": w, "attachment_path": a or None}
+        for b, m, p, w, a in zip(beschreibung, menge, einzelpreis, waehrung, anhang)
+    ]
+    return positionen, fehler, summen
+
+
+def _reset_grid():
+    """Leert das Raster; der Editor startet beim nächsten Lauf ohne die alten Änderungen."""
+    st.session_state[_GRID_DATA] = _empty_grid()
+    st.session_state.pop(_GRID_KEY, None)
+
+
+@st.fragment
+def _position_grid(templates: list):
+    """Positionsraster; Bearbeiten lädt nur dieses Fragment neu, nicht die ganze Seite."""
+    if _GRID_DATA not in st.session_state:
+        st.session_state[_GRID_DATA] = _empty_grid()
+
+    grid = st.data_editor(
+        st.session_state[_GRID_DATA],
+        key=_GRID_KEY,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_order=_GRID_COLUMNS,
+        column_config={
+            "vorlage": st.column_config.SelectboxColumn(
+                "Vorlage", options=[_template_label(t) for t in templates],
+                help="Übernimmt Beschreibung, Menge, Preis, Währung und Anhang der Vorlage",
+            ),
+            "beschreibung": st.column_config.TextColumn("Beschreibung", required=True, width="large"),
+            "menge": st.column_config.NumberColumn("Menge", default=1.0, format="%.2f"),
+            "einzelpreis": st.column_config.NumberColumn("Einzelpreis", default=0.0, format="%.2f"),
+            "waehrung": st.column_config.TextColumn("Währung", default="EUR", max_chars=3,
+                                                    validate=_CURRENCY_PATTERN),
+            "anhang": st.column_config.TextColumn("Anhang", default=""),
+        },
+        on_change=_apply_grid_templates,
+        args=(templates,),
+    )
+
+    _, fehler, summen = _validate_positions(grid)
+    st.dataframe(summen, hide_index=True, column_config={
+        "Summe": st.column_config.NumberColumn(format="%.2f"),
+    })
+    if fehler:
+        st.caption("⚠️ " + "; ".join(fehler))
+    return grid
+
+
+def _timesheet_upload(customer, jahr: int, monat: int):
+    """Zeiterfassung (CSV/Parquet) aggregieren und als Positionen ins Raster laden."""
+    import pandas as pd
+    from app.services.timesheet_import import DATE_FORMATS, import_timesheet
+
+    with st.expander("Aus Zeiterfassung übernehmen"):
+        upload = st.file_uploader("Zeiterfassung", type=["csv", "parquet"], key="timesheet_file")
+        col_sep, col_dec, col_date = st.columns(3)
+        sep = col_sep.selectbox("Trennzeichen (CSV)", [",", ";", "\t"], key="timesheet_sep",
+                                format_func=lambda c: "Tab" if c == "\t" else c)
+        decimal = col_dec.selectbox("Dezimalzeichen (CSV)", [".", ","], key="timesheet_decimal")
+        date_format = col_date.selectbox("Datumsformat", list(DATE_FORMATS), key="timesheet_date_format",
+                                         format_func=DATE_FORMATS.get)
+        st.caption("Spalten: kunde (ID oder Name), projekt, stunden; optional stundensatz, "
+                   "waehrung, vorlage, datum")
+        if upload is None or not st.button("Positionen übernehmen", key="timesheet_apply"):
+            return
+
+        upload.seek(0)  # bei erneutem Klick wieder von vorn lesen
+        with SessionLocal() as db:
+            try:
+                result = import_timesheet(db, upload, f"{jahr:04d}-{monat:02d}", date_format=date_format,
+                                          sep=sep, decimal=decimal)
+            except (ValueError, RuntimeError) as e:
+                st.error(str(e))
+                return
+        for spalte, anzahl in sorted(result.invalid_rows.items()):
+            beispiele = ", ".join(repr(v) for v in result.invalid_samples.get(spalte, []))
+            st.warning(f"{anzahl} Zeilen mit ungültigem Wert in „{spalte}“ nicht übernommen (z.B. {beispiele}).")
+        positions = result.positions.get(customer.id, [])
+        if not positions:
+            st.warning(f"Keine abrechenbaren Einträge für {customer.name} im Monat {monat:02d}/{jahr}.")
+            return
+
+        st.session_state[_GRID_DATA] = pd.DataFrame(
+            [{"vorlage": None, "beschreibung": p["beschreibung"], "menge": float(p["menge"]),
+              "einzelpreis": float(p["einzelpreis"]), "waehrung": p["waehrung"],
+              "anhang": p["attachment_path"] or ""} for p in positions],
+            columns=_GRID_COLUMNS,
+        )
+        st.success(f"{len(positions)} Positionen übernommen ({result.rows_used} Buchungen im Monat gelesen).")
+        for hinweis in result.skipped.get(customer.id, []):
+            st.warning(f"Übersprungen: {hinweis}")
+
+
 def create_invoice_page():
     st.title("🧾 Rechnung erstellen")
 
-    with SessionLocal() as db:
-        kunden = db.query(Customer).order_by(Customer.name).all()
-        templates = db.query(PositionTemplate).order_by(PositionTemplate.name).all()
+    kunden = list_customers()
+    templates = list_position_templates()
 
     if not kunden:
         st.warning("Es sind noch keine Kunden in der Datenbank angelegt.")
@@ -247,82 +505,239 @@ def create_invoice_page():
         monat = st.number_input("Monat", min_value=1, max_value=12, value=date.today().month)
 
     st.markdown("### Rechnungspositionen")
-    count = st.number_input("Anzahl Positionen", min_value=1, max_value=20, value=1)
-
-    template_labels = ["(frei)"] + [f"{t.id}: {t.name}" for t in templates]
-    template_map = {t.id: t for t in templates}
-
-    positionen = []
-    for i in range(int(count)):
-        st.subheader(f"Position {i + 1}")
-
-        sel = st.selectbox("Vorlage", template_labels, key=f"tmpl_{i}")
-        if sel != "(frei)":
-            if st.button("Vorlage übernehmen", key=f"use_{i}"):
-                tid = int(sel.split(":")[0])
-                t = template_map[tid]
-                st.session_state[f"desc_{i}"] = t.beschreibung
-                st.session_state[f"qty_{i}"] = float(t.standard_menge)
-                st.session_state[f"price_{i}"] = float(t.einzelpreis)
-                st.session_state[f"cur_{i}"] = t.waehrung
-                st.session_state[f"att_{i}"] = t.attachment_path or ""
-                st.rerun()
+    _timesheet_upload(customer, int(jahr), int(monat))
+    grid = _position_grid(templates)
 
-        beschreibung = st.text_input("Beschreibung", value=st.session_state.get(f"desc_{i}", ""), key=f"desc_{i}")
-        menge = st.number_input("Menge", value=float(st.session_state.get(f"qty_{i}", 1.0)), key=f"qty_{i}")
-        einzelpreis = st.number_input("Einzelpreis", value=float(st.session_state.get(f"price_{i}", 0.0)), key=f"price_{i}")
-        waehrung = st.text_input("Währung", value=st.session_state.get(f"cur_{i}", "EUR"), key=f"cur_{i}")
-        anhang = st.text_input("Anhang", value=st.session_state.get(f"att_{i}", ""), key=f"att_{i}")
+    anlagen_anhaengen = st.checkbox("PDF-Anhänge der Positionen an die Rechnung anhängen", value=False)
 
-        positionen.append({
-            "beschreibung": beschreibung,
-            "menge": menge,
-            "einzelpreis": einzelpreis,
-            "waehrung": waehrung,
-            "attachment_path": anhang or None,
-        })
-
-        st.divider()
+    erstellt = st.session_state.pop("invoice_created", None)
+    if erstellt:
+        st.success(f"Rechnung {erstellt} erstellt – das PDF wird im Hintergrund erzeugt.")
 
     if st.button("Rechnung generieren"):
-        for p in positionen:
-            if not (p["beschreibung"] or "").strip():
-                st.error("Bitte alle Beschreibungen ausfüllen (keine leeren Positionen).")
-                return
+        positionen, fehler, _ = _validate_positions(grid)
+        if fehler:
+            st.error("Positionen unvollständig: " + "; ".join(fehler))
+            return
+
+        missing = _unknown_attachments(p["attachment_path"] for p in positionen)
+        if missing:
+            st.error("Anhang nicht gefunden: " + ", ".join(missing))
+            return
 
         with SessionLocal() as db:
-            invoice = create_invoice_with_positions(
-                db_session=db,
-                customer=customer,
-                year=int(jahr),
-                month=int(monat),
-                positions=positionen,
-            )
-            pdf_path = generate_invoice_pdf(invoice)
+            try:
+                invoice = create_invoice_with_positions(
+                    db_session=db,
+                    customer=customer,
+                    year=int(jahr),
+                    month=int(monat),
+                    positions=positionen,
+                )
+            except ExchangeRateMissing as e:
+                db.rollback()
+                st.error(str(e))
+                return
+            # PDF rendert ein Worker (scripts/job_worker.py); die Seite bleibt bedienbar
+            job_id = job_queue.enqueue(db, "invoice_pdf", {"nummer": invoice.nummer, "bundle": anlagen_anhaengen})
+
+        st.session_state.setdefault("pdf_jobs", []).append((job_id, invoice.nummer, anlagen_anhaengen))
+        # Raster leeren, sonst legt ein zweiter Klick dieselbe Rechnung noch einmal an
+        _reset_grid()
+        st.session_state["invoice_created"] = invoice.nummer
+        st.rerun()
+
+    _pdf_jobs_panel()
 
-        st.success(f"Rechnung {invoice.nummer} erstellt.")
-        with open(pdf_path, "rb") as f:
+
+def _job_pdf_loader(nummer: str, datei: str | None, bundle: bool):
+    """Liefert die PDF-Bytes erst beim Klick auf den Download-Button.
+
+    Ist die Datei des Workers hier nicht sichtbar (anderer Host ohne gemeinsames
+    INVOICE_DIR), wird das PDF aus dem Snapshot im Speicher gerendert.
+    """
+    def load() -> bytes:
+        if datei is not None:
+            try:
+                with open(invoice_file_path(datei), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                pass
+        from app.services.invoice_snapshot import load_snapshot_payload
+        from app.services.pdf_service import render_invoice_pdf_bytes
+
+        with SessionLocal() as db:
+            invoice = load_snapshot_payload(db, nummer)
+        data = render_invoice_pdf_bytes(invoice)
+        if bundle:
+            from app.services.attachment_bundler import bundle_invoice_pdf
+
+            output = io.BytesIO()
+            bundle_invoice_pdf(data, [p["attachment_path"] for p in invoice["positions"]], output)
+            data = output.getvalue()
+        return data
+    return load
+
+
+def _pdf_jobs_panel():
+    """Status der eingereichten PDF-Jobs; aktualisiert sich alle 2 s, solange Jobs offen sind."""
+    jobs = st.session_state.get("pdf_jobs", [])
+    if not jobs:
+        return
+    final = st.session_state.setdefault("pdf_jobs_final", {})
+    offen = any(job_id not in final for job_id, _, _ in jobs)
+    st.fragment(_pdf_jobs_status, run_every=2 if offen else None)()
+
+
+def _pdf_jobs_status():
+    jobs = st.session_state["pdf_jobs"]
+    # abgeschlossene Jobs stehen in der Session und werden nicht erneut abgefragt
+    final = st.session_state["pdf_jobs_final"]
+    open_ids = [job_id for job_id, _, _ in jobs if job_id not in final]
+    states = dict(final)
+    if open_ids:
+        with SessionLocal() as db:
+            current = job_queue.get_jobs(db, open_ids)
+        for job_id in open_ids:
+            job = states[job_id] = current.get(job_id)
+            if job is None or job.status in (job_queue.DONE, job_queue.FAILED):
+                final[job_id] = job
+
+    st.markdown("### PDFs")
+    for job_id, nummer, bundle in reversed(jobs):
+        job = states[job_id]
+        if job is None:
+            continue
+        if job.status == job_queue.DONE:
+            if job.ergebnis.get("skipped"):
+                st.warning(f"Rechnung {nummer} – nicht angehängt (fehlt oder keine PDF): "
+                           + ", ".join(job.ergebnis["skipped"]))
             st.download_button(
-                "PDF herunterladen",
-                f.read(),
-                file_name=f"Rechnung_{invoice.nummer}.pdf",
+                f"PDF Rechnung {nummer} herunterladen",
+                _job_pdf_loader(nummer, job.ergebnis.get("datei"), bundle),
+                file_name=f"Rechnung_{nummer}.pdf",
                 mime="application/pdf",
+                key=f"pdf_job_{job_id}",
+            )
+        elif job.status == job_queue.FAILED:
+            grund = (job.fehler or "").strip().splitlines()
+            st.error(f"Rechnung {nummer}: PDF-Erzeugung fehlgeschlagen – "
+                     + (grund[0] if grund else "unbekannter Fehler"))
+        elif job.status == job_queue.RUNNING:
+            st.info(f"Rechnung {nummer}: PDF wird erzeugt …")
+        else:
+            hinweis = f" (Versuch {job.versuche + 1})" if job.versuche else ""
+            st.info(f"Rechnung {nummer}: wartet auf einen Worker{hinweis} …")
+
+    if st.button("Liste leeren", key="pdf_jobs_clear"):
+        st.session_state["pdf_jobs"] = []
+        st.session_state["pdf_jobs_final"] = {}
+        st.rerun()
+    elif open_ids and all(job_id in final for job_id, _, _ in jobs):
+        st.rerun()  # alle Jobs fertig: Panel ohne run_every neu aufbauen, das Polling endet
+
+
+# ---------------------------------------------------
+# Umsatzübersicht (liest nur revenue_summary)
+# ---------------------------------------------------
+def revenue_page():
+    st.title("📊 Umsatz")
+
+    heute = date.today()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        jahr = st.number_input("Jahr", value=heute.year, step=1, key="rev_year")
+    with col2:
+        von = st.number_input("Von Monat", min_value=1, max_value=12, value=1, key="rev_from")
+    with col3:
+        bis = st.number_input("Bis Monat", min_value=1, max_value=12, value=heute.month, key="rev_to")
+
+    kunden = {k.id: k.name for k in list_customers()}
+    kunde_id = st.selectbox(
+        "Kunde",
+        [None] + list(kunden),
+        format_func=lambda kid: "(alle)" if kid is None else f"{kunden[kid]} (ID {kid})",
+    )
+
+    with SessionLocal() as db:
+        rows = revenue_rows(db, f"{int(jahr):04d}-{int(von):02d}", f"{int(jahr):04d}-{int(bis):02d}", kunde_id)
+
+    if not rows:
+        st.info("Keine gebuchten Rechnungen im gewählten Zeitraum.")
+        return
+
+    summen = {}
+    for r in rows:
+        summen[r.zielwaehrung] = summen.get(r.zielwaehrung, 0) + r.umsatz
+    cols = st.columns(len(summen))
+    for col, (waehrung, summe) in zip(cols, sorted(summen.items())):
+        col.metric(f"Umsatz {waehrung}", f"{summe:,.2f}")
+
+    daten = [
+        {
+            "Monat": r.monat,
+            "Kunde": kunden.get(r.kunde_id, f"ID {r.kunde_id}"),
+            "Währung": r.zielwaehrung,
+            "Rechnungen": r.anzahl_rechnungen,
+            "Umsatz": float(r.umsatz),
+        }
+        for r in rows
+    ]
+    st.bar_chart(daten, x="Monat", y="Umsatz", color="Währung")
+    st.dataframe(daten, hide_index=True, use_container_width=True)
+
+
+# ---------------------------------------------------
+# Performance-Panel
+# ---------------------------------------------------
+def _perf_panel(page_trace):
+    data = page_trace.as_dict()
+    with st.sidebar:
+        st.markdown("### Messwerte")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Gesamt", f"{data['ms']:.0f} ms")
+        col2.metric("Queries", data["queries"])
+        col3.metric("DB", f"{data['db_ms']:.0f} ms")
+        if data["phases_ms"]:
+            st.dataframe(
+                [{"Phase": k, "ms": v} for k, v in data["phases_ms"].items()],
+                hide_index=True,
             )
+        if data["slowest_queries"]:
+            st.caption("Langsamste Queries")
+            for q in data["slowest_queries"]:
+                st.code(f"{q['ms']:.1f} ms  {q['sql']}", language="sql")
+        if page_trace.profile_path:
+            st.caption(f"Profil: {page_trace.profile_path}")
+            st.code(page_trace.profile_stats[:4000])
 
 
 # ---------------------------------------------------
 # App Shell
 # ---------------------------------------------------
 st.set_page_config(page_title="Invoice Automation", page_icon="🧾")
+# Datenbank aufwecken, während die erste Seite aufgebaut wird (einmal pro Prozess)
+warm_up_in_background()
 
 menu = st.sidebar.selectbox(
     "Menü",
-    ["Rechnung erstellen", "Kunden verwalten", "Positionen verwalten"],
+    ["Rechnung erstellen", "Kunden verwalten", "Positionen verwalten", "Umsatz"],
 )
 
-if menu == "Kunden verwalten":
-    manage_customers()
-elif menu == "Positionen verwalten":
-    manage_position_templates()
-else:
-    create_invoice_page()
+with st.sidebar.expander("Performance"):
+    show_perf = st.checkbox("Messwerte anzeigen", key="perf_panel")
+    # der Klick löst selbst einen Lauf aus – genau dieser wird profiliert
+    profile_run = st.button("Diesen Lauf profilieren (cProfile)", key="perf_profile")
+
+with trace(f"page:{menu}", profile=profile_run) as page_trace:
+    if menu == "Kunden verwalten":
+        manage_customers()
+    elif menu == "Positionen verwalten":
+        manage_position_templates()
+    elif menu == "Umsatz":
+        revenue_page()
+    else:
+        create_invoice_page()
+
+if show_perf:
+    _perf_panel(page_trace)
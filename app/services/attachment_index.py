@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import stat
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Basisordner der Anhänge (ADR-004); attachment_path ist relativ dazu (oder absolut)
+ATTACHMENTS_BASE_DIR = os.path.expanduser(
+    os.getenv("ATTACHMENTS_BASE_DIR", "~/Library/Mobile Documents/com~apple~CloudDocs/InvoiceAttachments")
+)
+INDEX_PATH = os.path.join(os.getenv("RENDER_CACHE_DIR", ".cache"), "attachments", "index.json")
+# Nach so vielen Sekunden wird im Hintergrund inkrementell nachgeprüft
+REFRESH_SECONDS = int(os.getenv("ATTACHMENT_INDEX_REFRESH_SECONDS", "60"))
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _normalize(attachment_path: str) -> str:
+    return os.path.normpath(attachment_path.strip()).replace(os.sep, "/")
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AttachmentIndex:
+    """Lokaler Index des Anhangsordners: Pfad -> Größe, mtime (SHA-256 bei Bedarf).
+
+    Nachschlagen ist ein Dict-Zugriff ohne Dateisystemzugriff. `refresh()`
+    listet nur Verzeichnisse neu, deren mtime sich geändert hat (neue,
+    gelöschte oder umbenannte Dateien); unveränderte Verzeichnisse kosten
+    nur ein `stat`. Dateien, die an Ort und Stelle überschrieben werden,
+    findet erst `refresh(full=True)`. Inhalte werden beim Abgleich nicht
+    gelesen – das würde im Cloud-Ordner jede Datei herunterladen (ADR-004);
+    den Hash berechnet erst `sha256()` beim Zusammenführen (Bundler) und
+    speichert ihn im Index.
+
+    Absolute Pfade außerhalb des Basisordners stehen nicht im Index und
+    werden einzeln per `stat` geprüft.
+    """
+
+    def __init__(self, base_dir: str = ATTACHMENTS_BASE_DIR, index_path: str = INDEX_PATH):
+        self.base_dir = base_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.refreshed_at = 0.0
+        self._dirs = {}   # rel_dir -> {"mtime": ns, "subdirs": [...], "files": [...]}
+        self._files = {}  # rel_path -> {"size": int, "mtime": ns[, "sha256": str]}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("base_dir") != self.base_dir:
+            return  # anderer Basisordner – neu aufbauen
+        self._dirs = data["dirs"]
+        self._files = data["files"]
+        self.refreshed_at = data.get("refreshed_at", 0.0)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"  # App und refresh_attachment_index.py schreiben parallel
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "base_dir": self.base_dir,
+                "refreshed_at": self.refreshed_at,
+                "dirs": self._dirs,
+                "files": self._files,
+            }, f)
+        os.replace(tmp, self.index_path)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._dirs
+
+    @property
+    def is_ready(self) -> bool:
+        """Mindestens ein vollständiger Abgleich liegt vor (geladen oder gelaufen)."""
+        return self.refreshed_at > 0
+
+    def _scan_dir(self, rel_dir: str, abs_dir: str, mtime: int, full: bool) -> list[str]:
+        """Listet ein Verzeichnis neu und aktualisiert dessen Dateieinträge."""
+        subdirs, files = [], []
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue  # versteckte Dateien und iCloud-Platzhalter
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    subdirs.append(rel)
+                elif entry.is_file():
+                    files.append(rel)
+                    st = entry.stat()
+                    known = self._files.get(rel)
+                    if full or known is None or known["size"] != st.st_size or known["mtime"] != st.st_mtime_ns:
+                        self._files[rel] = {"size": st.st_size, "mtime": st.st_mtime_ns}
+
+        old = self._dirs.get(rel_dir)
+        if old is not None:
+            for rel in set(old["files"]) - set(files):
+                self._files.pop(rel, None)
+        self._dirs[rel_dir] = {"mtime": mtime, "subdirs": subdirs, "files": files}
+        return subdirs
+
+    def refresh(self, full: bool = False) -> int:
+        """Gleicht den Index mit dem Dateisystem ab; gibt die Zahl neu gelisteter Verzeichnisse zurück."""
+        with self._lock:
+            scanned = 0
+            seen = set()
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(self.base_dir, rel_dir)
+                try:
+                    mtime = os.stat(abs_dir).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                seen.add(rel_dir)
+
+                known = self._dirs.get(rel_dir)
+                if not full and known is not None and known["mtime"] == mtime:
+                    stack.extend(known["subdirs"])
+                    continue
+                stack.extend(self._scan_dir(rel_dir, abs_dir, mtime, full))
+                scanned += 1
+
+            for rel_dir in set(self._dirs) - seen:
+                for rel in self._dirs.pop(rel_dir)["files"]:
+                    self._files.pop(rel, None)
+
+            self.refreshed_at = time.time()
+            self._save()
+            return scanned
+
+    def refresh_in_background(self):
+        """Startet einen inkrementellen Abgleich, falls nicht schon einer läuft."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            except OSError:
+                logger.exception("Anhangsindex konnte nicht aktualisiert werden")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="attachment-index", daemon=True).start()
+
+    def _key(self, attachment_path: str) -> str | None:
+        """Indexschlüssel (relativ zum Basisordner) oder None für Pfade außerhalb."""
+        path = os.path.expanduser(attachment_path.strip())
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.normpath(path), self.base_dir)
+        key = _normalize(path)
+        if key == ".." or key.startswith("../"):
+            return None
+        return key
+
+    def _absolute(self, attachment_path: str) -> str:
+        return os.path.join(self.base_dir, os.path.expanduser(attachment_path.strip()))
+
+    def _stat_entry(self, attachment_path: str) -> dict | None:
+        try:
+            info = os.stat(self._absolute(attachment_path))
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return {"size": info.st_size, "mtime": info.st_mtime_ns}
+
+    def lookup(self, attachment_path: str) -> dict | None:
+        """Indexeintrag (size, mtime) oder None.
+
+        Ohne Dateisystemzugriff, außer für absolute Pfade außerhalb des
+        Basisordners und solange der erste Abgleich noch läuft – dann ein
+        einzelnes `stat`.
+        """
+        key = self._key(attachment_path)
+        if key is None or not self.is_ready:
+            return self._stat_entry(attachment_path)
+        return self._files.get(key)
+
+    def exists(self, attachment_path: str) -> bool:
+        return self.lookup(attachment_path) is not None
+
+    def resolve(self, attachment_path: str) -> str | None:
+        """Absoluter Pfad eines vorhandenen Anhangs oder None."""
+        if self.lookup(attachment_path) is None:
+            return None
+        key = self._key(attachment_path)
+        return self._absolute(attachment_path) if key is None else os.path.join(self.base_dir, key)
+
+    def sha256(self, attachment_path: str) -> str | None:
+        """SHA-256 des Anhangs; wird beim ersten Aufruf berechnet und im Index gespeichert.
+
+        Liest die Datei einmal komplett – nur aufrufen, wenn sie ohnehin gelesen
+        wird (Zusammenführen). Ändern sich Größe oder mtime, fällt der Hash mit
+        dem Eintrag weg.
+        """
+        entry = self.lookup(attachment_path)
+        if entry is None:
+            return None
+        if "sha256" in entry:
+            return entry["sha256"]
+        digest = _sha256(self.resolve(attachment_path))
+        key = self._key(attachment_path)
+        with self._lock:
+            current = self._files.get(key) if key is not None else None
+            # nur übernehmen, wenn der Eintrag zwischenzeitlich nicht ersetzt wurde
+            if current is not None and (current["size"], current["mtime"]) == (entry["size"], entry["mtime"]):
+                current["sha256"] = digest
+                self._save()
+        return digest
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_attachment_index() -> AttachmentIndex:
+    """Prozessweiter Anhangsindex; Aufbau und Auffrischen laufen im Hintergrund."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = AttachmentIndex()
+    if not _index.is_ready or time.time() - _index.refreshed_at > REFRESH_SECONDS:
+        _index.refresh_in_background()
+    return _index
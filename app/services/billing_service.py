@@ -0,0 +1,222 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from types import SimpleNamespace
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.models import Customer, Invoice, InvoicePosition
+from app.services.exchange_rate_service import convert_amounts, month_rate_date
+from app.services.instrumentation import phase, traced
+from app.services.invoice_snapshot import write_snapshots
+from app.services.numbering_service import reserve_invoice_numbers, series_for_year
+from app.services.render_payload import build_render_payload
+from app.services.revenue_service import book_revenue
+
+logger = logging.getLogger(__name__)
+
+# Anzahl Rechnungen pro Transaktion im Sammellauf
+DEFAULT_CHUNK_SIZE = 200
+
+
+@dataclass
+class BillingResult:
+    """Ergebnis eines Abrechnungslaufs."""
+    monat: str
+    created: list[tuple[int, str]] = field(default_factory=list)  # (kunde_id, nummer)
+    failed: list[tuple[int, str]] = field(default_factory=list)  # (kunde_id, fehler)
+    seconds: float = 0.0
+
+    @property
+    def invoices_per_second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return len(self.created) / self.seconds
+
+
+def _prepare_positions(positions: list[dict]) -> list[dict]:
+    """Prüft die Positionen eines Kunden und normalisiert Menge/Preis auf Decimal."""
+    if not positions:
+        raise ValueError("keine Positionen angegeben")
+
+    prepared = []
+    for pos in positions:
+        beschreibung = (pos.get("beschreibung") or "").strip()
+        if not beschreibung:
+            raise ValueError("Position ohne Beschreibung")
+        try:
+            menge = Decimal(str(pos["menge"]))
+            einzelpreis = Decimal(str(pos["einzelpreis"]))
+        except (KeyError, InvalidOperation) as e:
+            raise ValueError(f"ungültige Menge/Einzelpreis: {e!r}") from e
+
+        prepared.append({
+            "beschreibung": beschreibung,
+            "menge": menge,
+            "einzelpreis": einzelpreis,
+            "waehrung": pos.get("waehrung") or "EUR",
+            "attachment_path": pos.get("attachment_path") or None,
+        })
+    return prepared
+
+
+def _insert_chunk(db: Session, chunk: list[dict], monat: str, serie: str) -> list[str]:
+    """Schreibt Rechnungen und Positionen eines Chunks mit je einem Bulk-INSERT; gibt die Nummern zurück."""
+    # ein Statement reserviert den ganzen Nummernblock des Chunks
+    numbers = reserve_invoice_numbers(db, len(chunk), serie)
+    invoice_rows = [
+        {
+            "uuid": uuid.uuid4(),
+            "nummer": nummer,
+            "monat": monat,
+            "kunde_id": item["kunde_id"],
+            "zielwaehrung": item["zielwaehrung"],
+            "gesamtbetrag": item["total"],
+            "status": "versendet",
+            "schedule_id": item.get("schedule_id"),
+        }
+        for item, nummer in zip(chunk, numbers)
+    ]
+    # insertmanyvalues: ein Multi-Row-INSERT inkl. RETURNING in Parameterreihenfolge
+    inserted = db.execute(
+        insert(Invoice).returning(Invoice.id, Invoice.created_at, sort_by_parameter_order=True),
+        invoice_rows,
+    ).all()
+    invoice_ids = [row.id for row in inserted]
+
+    position_rows = [
+        {"uuid": uuid.uuid4(), "invoice_id": invoice_id, **pos}
+        for item, invoice_id in zip(chunk, invoice_ids)
+        for pos in item["positions"]
+    ]
+    db.execute(insert(InvoicePosition), position_rows)
+    book_revenue(db, [
+        (row["kunde_id"], monat, row["zielwaehrung"], row["gesamtbetrag"]) for row in invoice_rows
+    ])
+    # Snapshots aus den gerade geschriebenen Werten, ohne die Rechnungen zurückzuladen
+    write_snapshots(db, [
+        (invoice_id, build_render_payload(
+            SimpleNamespace(**row, created_at=created_at),
+            item["customer"],
+            [SimpleNamespace(**pos) for pos in item["positions"]],
+        ))
+        for item, row, (invoice_id, created_at) in zip(chunk, invoice_rows, inserted)
+    ])
+    return numbers
+
+
+def load_billing_customers(db: Session, customer_ids) -> dict:
+    """Kundendaten für Zielwährung und Snapshot in einer Abfrage (kunde_id -> Row)."""
+    return {
+        c.id: c
+        for c in db.execute(
+            select(
+                Customer.id,
+                Customer.name,
+                Customer.adresse,
+                Customer.standard_currency,
+                Customer.company_number,
+                Customer.vat_number,
+                Customer.tax_number,
+            ).where(Customer.id.in_(list(customer_ids)))
+        ).all()
+    }
+
+
+def prepare_invoice(db: Session, customer, positions: list[dict], rate_date, **extra) -> dict:
+    """Prüft die Positionen und rechnet die Summe um; ValueError inkl. fehlender Kurse.
+
+    `extra` (z.B. schedule_id) wird in die Rechnungszeile übernommen.
+    """
+    rows = _prepare_positions(positions)
+    betraege = convert_amounts(
+        db,
+        [(p["menge"] * p["einzelpreis"], p["waehrung"]) for p in rows],
+        customer.standard_currency,
+        rate_date,
+    )
+    return {
+        "kunde_id": customer.id,
+        "zielwaehrung": customer.standard_currency,
+        "customer": customer,
+        "positions": rows,
+        "total": sum(betraege, Decimal("0.0")),
+        **extra,
+    }
+
+
+def write_invoices(db: Session, prepared: list[dict], monat: str, serie: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[list[tuple[dict, str]], list[tuple[dict, str]]]:
+    """Schreibt vorbereitete Rechnungen chunkweise und committet je Chunk.
+
+    Schlägt ein Chunk fehl, wird er rechnungsweise wiederholt, sodass eine
+    fehlerhafte Rechnung nicht den ganzen Lauf zurückrollt. Gibt
+    ([(item, nummer)], [(item, fehler)]) zurück.
+    """
+    created, failed = [], []
+    for i in range(0, len(prepared), chunk_size):
+        chunk = prepared[i:i + chunk_size]
+        try:
+            with phase("chunk"):
+                numbers = _insert_chunk(db, chunk, monat, serie)
+                db.commit()
+            created.extend(zip(chunk, numbers))
+        except SQLAlchemyError:
+            db.rollback()
+            logger.warning("Chunk %d fehlgeschlagen, wiederhole rechnungsweise", i // chunk_size)
+            for item in chunk:
+                try:
+                    numbers = _insert_chunk(db, [item], monat, serie)
+                    db.commit()
+                    created.append((item, numbers[0]))
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    failed.append((item, str(getattr(e, "orig", None) or e)))
+    return created, failed
+
+
+@traced("billing_run")
+def run_billing(
+    db_session: Session,
+    year: int,
+    month: int,
+    specs: dict[int, list[dict]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> BillingResult:
+    """Erstellt für alle Kunden in `specs` (kunde_id -> Positionen) je eine Rechnung.
+
+    Es wird chunkweise geschrieben und committet. Schlägt ein Chunk fehl, wird er
+    kundenweise wiederholt, sodass ein fehlerhafter Kunde nicht den ganzen Lauf
+    zurückrollt.
+    """
+    monat = f"{year:04d}-{month:02d}"
+    serie = series_for_year(year)
+    result = BillingResult(monat=monat)
+    start = time.perf_counter()
+
+    customers = load_billing_customers(db_session, specs)
+    rate_date = month_rate_date(year, month)
+    prepared = []
+    for kunde_id, positions in specs.items():
+        if kunde_id not in customers:
+            result.failed.append((kunde_id, "Kunde nicht gefunden"))
+            continue
+        try:
+            prepared.append(prepare_invoice(db_session, customers[kunde_id], positions, rate_date))
+        except ValueError as e:  # inkl. fehlender Wechselkurse
+            result.failed.append((kunde_id, str(e)))
+
+    created, failed = write_invoices(db_session, prepared, monat, serie, chunk_size)
+    result.created.extend((item["kunde_id"], nummer) for item, nummer in created)
+    result.failed.extend((item["kunde_id"], fehler) for item, fehler in failed)
+
+    result.seconds = time.perf_counter() - start
+    logger.info(
+        "Abrechnung %s: %d erstellt, %d fehlgeschlagen, %.1f Rechnungen/s",
+        monat, len(result.created), len(result.failed), result.invoices_per_second,
+    )
+    return result
@@ -0,0 +1,125 @@
+import csv
+import logging
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ExchangeRate
+from app.db.upsert import dialect_insert
+from app.services.exchange_rate_service import BASE_CURRENCY, invalidate_rate_table
+
+logger = logging.getLogger(__name__)
+
+# Zeilen pro Multi-Row-INSERT im Fallback (SQLite)
+CHUNK_SIZE = 5_000
+
+RateRow = tuple[datetime, str, str, Decimal]  # (datum, von, nach, kurs)
+
+
+def iter_ecb_csv(path: str) -> Iterator[RateRow]:
+    """Liest eine EZB-CSV (`Date,USD,JPY,...`, eine Zeile pro Tag) zeilenweise."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        currencies = header[1:]
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            datum = datetime.strptime(row[0].strip(), "%Y-%m-%d")
+            for currency, value in zip(currencies, row[1:]):
+                value = value.strip()
+                if not currency or not value or value == "N/A":
+                    continue
+                try:
+                    yield datum, BASE_CURRENCY, currency, Decimal(value)
+                except InvalidOperation:
+                    logger.warning("Ungültiger Kurs %r für %s am %s", value, currency, datum.date())
+
+
+def iter_ecb_xml(path: str) -> Iterator[RateRow]:
+    """Liest eine EZB-XML (`<Cube time=…><Cube currency=… rate=…/>`) per iterparse."""
+    datum = None
+    days = None  # äußerer Cube, der die Tages-Cubes enthält
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if not elem.tag.endswith("Cube"):
+            continue
+        if event == "start":
+            if "time" in elem.attrib:
+                datum = datetime.strptime(elem.attrib["time"], "%Y-%m-%d")
+            elif "currency" not in elem.attrib:
+                days = elem
+        elif "currency" in elem.attrib and datum is not None:
+            value = elem.attrib.get("rate", "")
+            try:
+                yield datum, BASE_CURRENCY, elem.attrib["currency"], Decimal(value)
+            except InvalidOperation:
+                logger.warning("Ungültiger Kurs %r für %s am %s", value, elem.attrib["currency"], datum.date())
+        elif "time" in elem.attrib:
+            # verarbeiteten Tag leeren und aus dem äußeren Cube lösen, Speicher bleibt konstant
+            elem.clear()
+            if days is not None:
+                days.remove(elem)
+
+
+def iter_rate_file(path: str) -> Iterator[RateRow]:
+    if path.lower().endswith(".xml"):
+        return iter_ecb_xml(path)
+    return iter_ecb_csv(path)
+
+
+def _copy_postgres(db: Session, rows: Iterable[RateRow]) -> int:
+    """COPY in eine temporäre Tabelle, dann ein INSERT … ON CONFLICT DO NOTHING."""
+    # DBAPI-Verbindung (psycopg) der laufenden Session-Transaktion
+    raw = db.connection().connection
+    with raw.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE tmp_exchange_rate "
+            "(datum timestamp, von text, nach text, kurs numeric) ON COMMIT DROP"
+        )
+        with cur.copy("COPY tmp_exchange_rate (datum, von, nach, kurs) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        cur.execute(
+            "INSERT INTO exchange_rate (uuid, datum, von, nach, kurs) "
+            "SELECT gen_random_uuid(), datum, von, nach, kurs FROM ("
+            "  SELECT DISTINCT ON (datum, von, nach) datum, von, nach, kurs FROM tmp_exchange_rate"
+            ") t "
+            "ON CONFLICT (von, nach, datum) DO NOTHING"
+        )
+        return cur.rowcount
+
+
+def _insert_chunked(db: Session, rows: Iterable[RateRow]) -> int:
+    """Fallback: Multi-Row-INSERT … ON CONFLICT DO NOTHING in Blöcken."""
+    before = db.execute(select(func.count()).select_from(ExchangeRate)).scalar_one()
+    stmt = dialect_insert(db, ExchangeRate).on_conflict_do_nothing(
+        index_elements=[ExchangeRate.von, ExchangeRate.nach, ExchangeRate.datum]
+    )
+    rows = iter(rows)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        db.execute(stmt, [
+            {"uuid": uuid.uuid4(), "datum": datum, "von": von, "nach": nach, "kurs": kurs}
+            for datum, von, nach, kurs in chunk
+        ])
+    after = db.execute(select(func.count()).select_from(ExchangeRate)).scalar_one()
+    return after - before
+
+
+def import_rates(db: Session, rows: Iterable[RateRow]) -> int:
+    """Importiert Kurse gestreamt; bereits vorhandene (datum, von, nach) werden übersprungen.
+
+    Gibt die Zahl neu angelegter Zeilen zurück. Committet und invalidiert den Kurs-Cache.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        inserted = _copy_postgres(db, rows)
+    else:
+        inserted = _insert_chunked(db, rows)
+    db.commit()
+    invalidate_rate_table()
+    return inserted
@@ -0,0 +1,162 @@
+import calendar
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ExchangeRate
+
+# Referenzwährung für Kreuzkurse (EZB-Kurse sind EUR-basiert)
+BASE_CURRENCY = "EUR"
+# Spätestens nach dieser Zeit neu laden, auch ohne expliziten Invalidierungsaufruf
+CACHE_SECONDS = int(os.getenv("EXCHANGE_RATE_CACHE_SECONDS", "3600"))
+# So oft wird höchstens gegen die DB geprüft, ob andere Prozesse Kurse geschrieben haben
+REVALIDATE_SECONDS = float(os.getenv("EXCHANGE_RATE_REVALIDATE_SECONDS", "5"))
+CENT = Decimal("0.01")
+
+
+class ExchangeRateMissing(ValueError):
+    """Für ein Währungspaar liegt zum Stichtag kein Kurs vor."""
+
+
+def month_rate_date(year: int, month: int) -> date:
+    """Stichtag für die Umrechnung: Monatsletzter, höchstens heute."""
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    return min(last, date.today())
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class RateTable:
+    """Alle Kurse je Währungspaar als nach Datum sortierte Arrays.
+
+    `kurs` ist der Preis von 1 `von` in `nach`. Stichtagsabfragen laufen per
+    Binärsuche: gilt der letzte Kurs am oder vor dem Stichtag.
+    """
+
+    def __init__(self, rows: Iterable[tuple]):
+        pairs = defaultdict(list)
+        for datum, von, nach, kurs in rows:
+            pairs[(von, nach)].append((_as_date(datum), Decimal(kurs)))
+
+        self._dates = {}
+        self._rates = {}
+        for pair, entries in pairs.items():
+            entries.sort(key=lambda e: e[0])
+            self._dates[pair] = [e[0] for e in entries]
+            self._rates[pair] = [e[1] for e in entries]
+
+    def _direct(self, von: str, nach: str, as_of: date) -> Decimal | None:
+        dates = self._dates.get((von, nach))
+        if not dates:
+            return None
+        i = bisect_right(dates, as_of)
+        if i == 0:
+            return None
+        return self._rates[(von, nach)][i - 1]
+
+    def _pair(self, von: str, nach: str, as_of: date) -> Decimal | None:
+        """Direkter oder inverser Kurs."""
+        if von == nach:
+            return Decimal(1)
+        rate = self._direct(von, nach, as_of)
+        if rate is not None:
+            return rate
+        inverse = self._direct(nach, von, as_of)
+        if inverse:
+            return Decimal(1) / inverse
+        return None
+
+    def rate(self, von: str, nach: str, as_of: date) -> Decimal:
+        """Kurs von -> nach zum Stichtag; notfalls über die Referenzwährung trianguliert."""
+        as_of = _as_date(as_of)
+        rate = self._pair(von, nach, as_of)
+        if rate is not None:
+            return rate
+        to_base = self._pair(von, BASE_CURRENCY, as_of)
+        from_base = self._pair(BASE_CURRENCY, nach, as_of)
+        if to_base is not None and from_base is not None:
+            return to_base * from_base
+        raise ExchangeRateMissing(f"Kein Wechselkurs {von}->{nach} zum {as_of.isoformat()} vorhanden.")
+
+
+_table = None
+_loaded_at = 0.0
+_checked_at = 0.0
+_fingerprint = None
+_lock = threading.Lock()
+
+
+def _rate_fingerprint(db: Session) -> tuple:
+    """Anzahl, höchste ID und letzte Änderung der Kurse – ändert sich bei jedem Import."""
+    return tuple(db.execute(
+        select(func.count(), func.max(ExchangeRate.id), func.max(ExchangeRate.updated_at))
+    ).one())
+
+
+def get_rate_table(db: Session) -> RateTable:
+    """Prozessweit gecachte Kurstabelle; wird einmal komplett geladen.
+
+    Höchstens alle REVALIDATE_SECONDS wird per Fingerabdruck geprüft, ob
+    Kurse hinzugekommen oder geändert sind (z.B. durch den Kursimport in einem
+    anderen Prozess); nur dann wird neu geladen.
+    """
+    global _table, _loaded_at, _checked_at, _fingerprint
+    with _lock:
+        now = time.monotonic()
+        if _table is not None and now - _checked_at < REVALIDATE_SECONDS and now - _loaded_at <= CACHE_SECONDS:
+            return _table
+        fingerprint = _rate_fingerprint(db)
+        if _table is None or fingerprint != _fingerprint or now - _loaded_at > CACHE_SECONDS:
+            rows = db.execute(
+                select(ExchangeRate.datum, ExchangeRate.von, ExchangeRate.nach, ExchangeRate.kurs)
+            ).all()
+            _table = RateTable(rows)
+            _fingerprint = fingerprint
+            _loaded_at = now
+        _checked_at = now
+        return _table
+
+
+def invalidate_rate_table():
+    """Nach dem Import neuer Kurse aufrufen; der nächste Zugriff lädt im selben Prozess sofort neu.
+
+    Andere Prozesse bemerken den Import über den Fingerabdruck in `get_rate_table`.
+    """
+    global _table
+    with _lock:
+        _table = None
+
+
+def convert_amounts(
+    db: Session,
+    items: Iterable[tuple[Decimal, str]],
+    zielwaehrung: str,
+    as_of: date,
+) -> list[Decimal]:
+    """Rechnet (betrag, waehrung)-Paare in einem Durchgang in die Zielwährung um.
+
+    Jeder Kurs wird nur einmal nachgeschlagen; die Kurstabelle wird nur
+    geladen, wenn überhaupt eine Fremdwährung vorkommt. Umgerechnete Beträge
+    werden auf Cent gerundet.
+    """
+    items = list(items)
+    currencies = {waehrung for _, waehrung in items if waehrung != zielwaehrung}
+    if not currencies:
+        return [betrag for betrag, _ in items]
+
+    table = get_rate_table(db)
+    rates = {waehrung: table.rate(waehrung, zielwaehrung, as_of) for waehrung in currencies}
+    return [
+        betrag if waehrung == zielwaehrung else (betrag * rates[waehrung]).quantize(CENT)
+        for betrag, waehrung in items
+    ]
@@ -0,0 +1,161 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.perf")
+
+# Zusätzlich jede Messung als JSON-Zeile in diese Datei schreiben (leer = nur Logger)
+PERF_LOG_PATH = os.getenv("PERF_LOG_PATH", "")
+PROFILE_DIR = os.path.join(os.getenv("RENDER_CACHE_DIR", ".cache"), "profiles")
+# Anzahl der langsamsten Statements, die je Messung festgehalten werden
+SLOWEST_QUERIES = 5
+
+_current: ContextVar["Trace | None"] = ContextVar("perf_trace", default=None)
+_log_lock = threading.Lock()
+
+
+class Trace:
+    """Messwerte eines Seitenlaufs bzw. Service-Aufrufs: Queries, DB-Zeit, Phasen."""
+
+    def __init__(self, name: str, **fields):
+        self.name = name
+        self.fields = fields
+        self.started_at = datetime.now(timezone.utc)
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases: dict[str, float] = {}
+        self.slowest: list[tuple[float, str]] = []
+        self.profile_path: str | None = None
+        self.profile_stats: str | None = None
+
+    def add_query(self, seconds: float, statement: str):
+        self.queries += 1
+        self.db_seconds += seconds
+        if len(self.slowest) < SLOWEST_QUERIES or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, " ".join(statement.split())[:200]))
+            self.slowest.sort(key=lambda q: q[0], reverse=True)
+            del self.slowest[SLOWEST_QUERIES:]
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            **self.fields,
+            "started_at": self.started_at.isoformat(),
+            "ms": round(self.seconds * 1000, 1),
+            "queries": self.queries,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "phases_ms": {k: round(v * 1000, 1) for k, v in self.phases.items()},
+            "slowest_queries": [{"ms": round(s * 1000, 1), "sql": sql} for s, sql in self.slowest],
+            "profile": self.profile_path,
+        }
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+# an der Engine-Klasse, damit die Engine dafür nicht schon beim Import entstehen muss
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("perf_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    starts = conn.info.get("perf_query_start")
+    if trace is None or not starts:
+        return
+    trace.add_query(time.perf_counter() - starts.pop(), statement)
+
+
+def _write_log(trace: Trace):
+    line = json.dumps(trace.as_dict(), ensure_ascii=False)
+    logger.info(line)
+    if PERF_LOG_PATH:
+        with _log_lock, open(PERF_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _dump_profile(trace: Trace, profiler: cProfile.Profile):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() else "_" for c in trace.name)
+    trace.profile_path = os.path.join(PROFILE_DIR, f"{safe_name}-{trace.started_at:%Y%m%d-%H%M%S}.prof")
+    profiler.dump_stats(trace.profile_path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+    trace.profile_stats = out.getvalue()
+
+
+@contextmanager
+def trace(name: str, profile: bool = False, **fields):
+    """Misst einen Seitenlauf oder Service-Aufruf und schreibt das Ergebnis ins JSON-Log.
+
+    Innerhalb einer laufenden Messung zählt ein verschachteltes `trace` nur
+    als Phase der äußeren. Mit `profile=True` läuft cProfile mit; die
+    .prof-Datei landet unter PROFILE_DIR.
+    """
+    outer = _current.get()
+    if outer is not None:
+        with phase(name):
+            yield outer
+        return
+
+    current = Trace(name, **fields)
+    token = _current.set(current)
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield current
+    finally:
+        if profiler:
+            profiler.disable()
+        current.seconds = time.perf_counter() - start
+        _current.reset(token)
+        if profiler:
+            _dump_profile(current, profiler)
+        _write_log(current)
+
+
+@contextmanager
+def phase(name: str):
+    """Addiert die Dauer des Blocks als Phase zur laufenden Messung (ohne Messung: no-op)."""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add_phase(name, time.perf_counter() - start)
+
+
+def traced(name: str):
+    """Decorator-Variante von `trace` für Service-Funktionen."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
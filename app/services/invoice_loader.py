@@ -0,0 +1,48 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+
+from app.db.models import Invoice
+
+
+def load_render_invoices(
+    db: Session,
+    ids: Iterable[int] | None = None,
+    monat: str | None = None,
+) -> list[Invoice]:
+    """Lädt Rechnungen samt Kunde und Positionen in konstant vielen Abfragen.
+
+    Kunde per JOIN, Positionen per SELECT … IN (eine Abfrage je 500
+    Rechnungen). Die Objekte werden von der Session gelöst und sind danach
+    ohne Datenbankzugriff renderbar; jeder weitere Lazy-Load löst einen
+    Fehler aus, statt still eine Abfrage abzusetzen.
+    """
+    stmt = (
+        select(Invoice)
+        .options(
+            joinedload(Invoice.customer),
+            selectinload(Invoice.positions),
+            raiseload("*", sql_only=True),
+        )
+        .order_by(Invoice.id)
+    )
+    if ids is not None:
+        stmt = stmt.where(Invoice.id.in_(list(ids)))
+    if monat is not None:
+        stmt = stmt.where(Invoice.monat == monat)
+
+    invoices = db.execute(stmt).unique().scalars().all()
+    for invoice in invoices:
+        for position in invoice.positions:
+            db.expunge(position)
+        if invoice.customer in db:
+            db.expunge(invoice.customer)
+        db.expunge(invoice)
+    return invoices
+
+
+def load_render_invoice(db: Session, invoice_id: int) -> Invoice | None:
+    """Einzelne Rechnung wie `load_render_invoices`."""
+    invoices = load_render_invoices(db, ids=[invoice_id])
+    return invoices[0] if invoices else None
@@ -1,16 +1,22 @@
 import uuid
+from datetime import date
 from decimal import Decimal
 from sqlalchemy.orm import Session
 
 from app.db.models import Invoice, InvoicePosition
+from app.services.exchange_rate_service import convert_amounts, month_rate_date
+from app.services.instrumentation import phase, traced
+from app.services.invoice_loader import load_render_invoice
+from app.services.invoice_snapshot import snapshot_invoice
+from app.services.numbering_service import reserve_invoice_numbers, series_for_year
+from app.services.revenue_service import book_invoice, book_revenue, counts_as_revenue
 
-def generate_invoice_number(db: Session) -> str:
-    """Generiert eine einfache fortlaufende Rechnungsnummer."""
-    last_invoice = db.query(Invoice).order_by(Invoice.id.desc()).first()
-    if last_invoice and last_invoice.nummer.isdigit():
-        return str(int(last_invoice.nummer) + 1).zfill(5)
-    return "00001"
+def generate_invoice_number(db: Session, year: int | None = None) -> str:
+    """Reserviert die nächste Rechnungsnummer im Nummernkreis des Jahres."""
+    serie = series_for_year(year if year is not None else date.today().year)
+    return reserve_invoice_numbers(db, 1, serie)[0]
 
+@traced("create_invoice")
 def create_invoice_with_positions(
     db_session: Session,
     customer,
@@ -18,9 +24,13 @@ def create_invoice_with_positions(
     month: int,
     positions: list[dict]
 ) -> Invoice:
-    """Erstellt eine Rechnung und die zugehörigen Positionen."""
+    """Erstellt eine Rechnung und die zugehörigen Positionen.
+
+    Gibt die Rechnung samt Kunde und Positionen losgelöst von der Session zurück.
+    """
     # Rechnungsnummer und Bezeichner
-    invoice_number = generate_invoice_number(db_session)
+    with phase("nummer"):
+        invoice_number = generate_invoice_number(db_session, year)
     invoice = Invoice(
         uuid=uuid.uuid4(),
         nummer=invoice_number,
@@ -30,13 +40,21 @@ def create_invoice_with_positions(
         status="Entwurf",
     )
     db_session.add(invoice)
-    db_session.flush()  # erzeugt invoice.id
+    with phase("insert"):
+        db_session.flush()  # erzeugt invoice.id
+
+    # Positionsbeträge in einem Durchgang in die Zielwährung umrechnen
+    with phase("umrechnung"):
+        betraege = convert_amounts(
+            db_session,
+            [(Decimal(pos["menge"]) * Decimal(pos["einzelpreis"]), pos["waehrung"]) for pos in positions],
+            invoice.zielwaehrung,
+            month_rate_date(year, month),
+        )
+    total = sum(betraege, Decimal("0.0"))
 
-    total = Decimal("0.0")
+    invoice_positions = []
     for pos in positions:
-        # ggf. Währungsumrechnung einbauen
-        betrag = Decimal(pos["menge"]) * Decimal(pos["einzelpreis"])
-        total += betrag
         invoice_position = InvoicePosition(
             uuid=uuid.uuid4(),
             invoice_id=invoice.id,
@@ -47,9 +65,29 @@ def create_invoice_with_positions(
             attachment_path=pos.get("attachment_path"),
         )
         db_session.add(invoice_position)
+        invoice_positions.append(invoice_position)
 
     invoice.gesamtbetrag = total
     invoice.status = "versendet"  # Beispielstatus
+    with phase("abschluss"):
+        book_invoice(db_session, invoice)  # Umsatzübersicht in derselben Transaktion
+        snapshot_invoice(db_session, invoice, customer, invoice_positions)
+        db_session.commit()
+    # renderfertig und von der Session gelöst – das Template löst keine Lazy-Loads mehr aus
+    with phase("laden"):
+        return load_render_invoice(db_session, invoice.id)
+
+def set_invoice_status(db_session: Session, invoice: Invoice, status: str) -> Invoice:
+    """Ändert den Status und hält die Umsatzübersicht in derselben Transaktion aktuell."""
+    if status == invoice.status:
+        return invoice
+    was_revenue = counts_as_revenue(invoice.status)
+    invoice.status = status
+    if was_revenue != counts_as_revenue(status):
+        book_revenue(
+            db_session,
+            [(invoice.kunde_id, invoice.monat, invoice.zielwaehrung, invoice.gesamtbetrag)],
+            sign=-1 if was_revenue else 1,
+        )
     db_session.commit()
-    db_session.refresh(invoice)
     return invoice
@@ -0,0 +1,68 @@
+import uuid
+from typing import Iterable
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Invoice, InvoiceSnapshot
+from app.services.invoice_loader import load_render_invoices
+from app.services.render_payload import (
+    SNAPSHOT_VERSION,
+    build_render_payload,
+    payload_from_document,
+    payload_to_document,
+)
+
+
+def snapshot_row(invoice_id: int, payload: dict) -> dict:
+    """Zeile für `invoice_snapshot` aus einem Render-Payload."""
+    return {
+        "uuid": uuid.uuid4(),
+        "invoice_id": invoice_id,
+        "version": SNAPSHOT_VERSION,
+        "nummer": payload["nummer"],
+        "monat": payload["monat"],
+        "dokument": payload_to_document(payload),
+    }
+
+
+def write_snapshots(db: Session, items: Iterable[tuple[int, dict]]):
+    """Legt Snapshots für (invoice_id, payload)-Paare mit einem Bulk-INSERT an.
+
+    Wird beim Abschluss der Rechnung in derselben Transaktion aufgerufen;
+    ein Snapshot wird danach nicht mehr verändert.
+    """
+    rows = [snapshot_row(invoice_id, payload) for invoice_id, payload in items]
+    if rows:
+        db.execute(insert(InvoiceSnapshot), rows)
+
+
+def snapshot_invoice(db: Session, invoice: Invoice, customer=None, positions=None):
+    """Friert eine einzelne Rechnung ein (siehe `build_render_payload` zu customer/positions)."""
+    write_snapshots(db, [(invoice.id, build_render_payload(invoice, customer, positions))])
+
+
+def load_snapshot_payload(db: Session, nummer: str) -> dict | None:
+    """Render-Payload einer Rechnung aus ihrem Snapshot – ein Zeilenzugriff, keine Joins."""
+    doc = db.execute(
+        select(InvoiceSnapshot.dokument).where(InvoiceSnapshot.nummer == nummer)
+    ).scalar_one_or_none()
+    return payload_from_document(doc) if doc is not None else None
+
+
+def load_month_payloads(db: Session, monat: str) -> list[dict]:
+    """Render-Payloads aller Rechnungen eines Monats; ohne Snapshot wird aus den Tabellen gebaut."""
+    docs = db.execute(
+        select(InvoiceSnapshot.dokument)
+        .where(InvoiceSnapshot.monat == monat)
+        .order_by(InvoiceSnapshot.invoice_id)
+    ).scalars().all()
+    payloads = [payload_from_document(doc) for doc in docs]
+
+    # Altbestand/Entwürfe ohne Snapshot
+    missing = db.execute(
+        select(Invoice.id).where(Invoice.monat == monat, ~Invoice.snapshot.has())
+    ).scalars().all()
+    if missing:
+        payloads += [build_render_payload(inv) for inv in load_render_invoices(db, ids=missing)]
+    return payloads
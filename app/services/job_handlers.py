@@ -0,0 +1,35 @@
+"""Job-Arten des Hintergrund-Workers; wird von `job_queue.run_worker` importiert."""
+import os
+
+from app.db.session import SessionLocal
+from app.services.invoice_snapshot import load_snapshot_payload
+from app.services.job_queue import job_handler
+from app.services.render_payload import invoice_file_key
+
+
+@job_handler("invoice_pdf")
+def invoice_pdf(payload: dict) -> dict:
+    """Erzeugt `<INVOICE_DIR>/<monat>/<nummer>.pdf` aus dem Snapshot.
+
+    payload: {"nummer": ..., "bundle": bool} – mit `bundle` zusätzlich
+    `<nummer>_mit_anlagen.pdf` inkl. der Positions-Anhänge. Ergebnis
+    `{"datei": ...}` ist relativ zu INVOICE_DIR.
+    """
+    from app.services.pdf_service import generate_invoice_pdf
+
+    with SessionLocal() as db:
+        invoice = load_snapshot_payload(db, payload["nummer"])
+    if invoice is None:
+        raise LookupError(f"Kein Snapshot für Rechnung {payload['nummer']}")
+
+    path = generate_invoice_pdf(invoice)
+    result = {"datei": invoice_file_key(path)}
+
+    attachments = [p["attachment_path"] for p in invoice["positions"]]
+    if payload.get("bundle") and any(attachments):
+        from app.services.attachment_bundler import bundle_invoice_pdf
+
+        bundle_path = os.path.splitext(path)[0] + "_mit_anlagen.pdf"
+        skipped = bundle_invoice_pdf(path, attachments, bundle_path)
+        result.update(datei=invoice_file_key(bundle_path), skipped=skipped)
+    return result
@@ -0,0 +1,182 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Job
+from app.db.session import SessionLocal
+from app.services.instrumentation import trace
+
+logger = logging.getLogger(__name__)
+
+# Sekunden zwischen zwei Abfragen, wenn die Queue leer ist
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+# Laufende Jobs ohne Abschluss nach dieser Zeit gelten als verwaist (Worker abgestürzt)
+STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+# Wartezeit vor dem n-ten Wiederholungsversuch: RETRY_BASE_SECONDS * 2^(n-1)
+RETRY_BASE_SECONDS = 5
+
+WAITING = "wartend"
+RUNNING = "laeuft"
+DONE = "erledigt"
+FAILED = "fehlgeschlagen"
+
+# art -> Funktion(payload: dict) -> Ergebnis (JSON-tauglich)
+_handlers: dict[str, Callable[[dict], dict]] = {}
+
+
+def job_handler(art: str):
+    """Registriert eine Funktion als Ausführung für Jobs der Art `art`."""
+    def register(func):
+        _handlers[art] = func
+        return func
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: Session, art: str, payload: dict, max_versuche: int = 3) -> int:
+    """Stellt einen Job ein und committet; gibt die Job-ID zurück."""
+    job = Job(art=art, payload=payload, status=WAITING, max_versuche=max_versuche, verfuegbar_ab=_now())
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def get_job(db: Session, job_id: int):
+    """Status, Ergebnis und Fehler eines Jobs (für das Polling der UI)."""
+    return get_jobs(db, [job_id]).get(job_id)
+
+
+def get_jobs(db: Session, job_ids) -> dict:
+    """Wie `get_job` für mehrere Jobs in einer Abfrage: {job_id: Zeile}."""
+    rows = db.execute(
+        select(Job.id, Job.art, Job.status, Job.versuche, Job.ergebnis, Job.fehler).where(Job.id.in_(list(job_ids)))
+    )
+    return {row.id: row for row in rows}
+
+
+def claim_job(db: Session, worker: str) -> Job | None:
+    """Übernimmt den ältesten fälligen Job und markiert ihn als laufend.
+
+    Postgres: `FOR UPDATE SKIP LOCKED` – parallele Worker überspringen
+    gesperrte Zeilen statt zu warten. Andere Backends (SQLite): optimistisch
+    per bedingtem UPDATE; verliert ein Worker das Rennen, versucht er den
+    nächsten Kandidaten.
+    """
+    now = _now()
+    candidates = (
+        select(Job)
+        .where(Job.status == WAITING, Job.verfuegbar_ab <= now)
+        .order_by(Job.id)
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        job = db.execute(candidates.limit(1).with_for_update(skip_locked=True)).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+        job.status = RUNNING
+        job.versuche += 1
+        job.gestartet_at = now
+        job.worker = worker
+        db.commit()
+        return job
+
+    for job_id in db.execute(candidates.with_only_columns(Job.id).limit(10)).scalars().all():
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == WAITING)
+            .values(status=RUNNING, versuche=Job.versuche + 1, gestartet_at=now, worker=worker)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+    return None
+
+
+def requeue_stale(db: Session) -> int:
+    """Stellt Jobs verwaister Worker wieder ein; gibt deren Anzahl zurück.
+
+    Ein Job, der seinen Worker bei jedem Versuch mitreißt, wird nach
+    `max_versuche` als fehlgeschlagen markiert statt endlos neu eingestellt.
+    """
+    now = _now()
+    stale = (Job.status == RUNNING, Job.gestartet_at < now - timedelta(seconds=STALE_SECONDS))
+    failed = db.execute(
+        update(Job)
+        .where(*stale, Job.versuche >= Job.max_versuche)
+        .values(status=FAILED, worker=None, beendet_at=now,
+                fehler="Worker ohne Abschluss beendet (verwaist), keine Versuche mehr übrig")
+    ).rowcount
+    count = db.execute(
+        update(Job)
+        .where(*stale)
+        .values(status=WAITING, worker=None, fehler="Worker ohne Abschluss beendet (verwaist)")
+    ).rowcount
+    db.commit()
+    if failed or count:
+        logger.warning("Verwaiste Jobs: %d neu eingestellt, %d endgültig fehlgeschlagen", count, failed)
+    return count
+
+
+def run_job(db: Session, job: Job):
+    """Führt einen übernommenen Job aus und hält Ergebnis bzw. Fehler fest."""
+    handler = _handlers.get(job.art)
+    try:
+        if handler is None:
+            raise LookupError(f"Keine Ausführung für Job-Art {job.art!r} registriert")
+        with trace(f"job:{job.art}", job_id=job.id):
+            result = handler(job.payload)
+    except Exception as e:
+        logger.warning("Job %s (%s) fehlgeschlagen, Versuch %d/%d: %s",
+                       job.id, job.art, job.versuche, job.max_versuche, e)
+        db.rollback()
+        job.fehler = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+        if job.versuche < job.max_versuche and handler is not None:
+            job.status = WAITING
+            job.verfuegbar_ab = _now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.versuche - 1))
+        else:
+            job.status = FAILED
+            job.beendet_at = _now()
+        db.commit()
+        return
+
+    job.status = DONE
+    job.ergebnis = result
+    job.fehler = None
+    job.beendet_at = _now()
+    db.commit()
+
+
+def run_worker(once: bool = False, poll_seconds: float = POLL_SECONDS):
+    """Arbeitsschleife: Jobs übernehmen und ausführen, bei leerer Queue pollen.
+
+    Mit `once=True` wird zurückgekehrt, sobald die Queue leer ist.
+    """
+    import app.services.job_handlers  # noqa: F401 – registriert die Job-Arten
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Worker %s gestartet", worker)
+    with SessionLocal() as db:
+        requeue_stale(db)
+        last_stale_check = time.monotonic()
+        while True:
+            job = claim_job(db, worker)
+            if job is not None:
+                run_job(db, job)
+                continue
+            if once:
+                return
+            if time.monotonic() - last_stale_check > STALE_SECONDS:
+                requeue_stale(db)
+                last_stale_check = time.monotonic()
+            time.sleep(poll_seconds)
@@ -0,0 +1,54 @@
+import os
+import uuid
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.db.models import InvoiceNumberCounter
+from app.db.upsert import dialect_insert
+
+# "fortlaufend": eine durchgehende Serie (00001, 00002, ...)
+# "jahr": eine Serie pro Jahr (2026-00001, 2026-00002, ...)
+NUMBER_SCHEME = os.getenv("INVOICE_NUMBER_SCHEME", "fortlaufend")
+GLOBAL_SERIES = "fortlaufend"
+
+
+def series_for_year(year: int) -> str:
+    """Nummernkreis, aus dem Rechnungen des Jahres `year` ihre Nummer beziehen."""
+    if NUMBER_SCHEME == "jahr":
+        return f"{year:04d}"
+    return GLOBAL_SERIES
+
+
+def format_invoice_number(serie: str, value: int) -> str:
+    if serie == GLOBAL_SERIES:
+        return str(value).zfill(5)
+    return f"{serie}-{value:05d}"
+
+
+def reserve_invoice_numbers(db: Session, count: int, serie: str = GLOBAL_SERIES) -> list[str]:
+    """Reserviert `count` lückenlos aufeinanderfolgende Nummern mit einem einzigen Statement.
+
+    Der Zähler wird per Upsert hochgesetzt; die Zeile bleibt bis zum Ende der
+    Transaktion gesperrt. Ein Rollback gibt die Nummern wieder frei, daher
+    entstehen keine Lücken – vorausgesetzt, der Aufrufer legt die Rechnungen
+    in derselben Transaktion an.
+    """
+    if count < 1:
+        raise ValueError("count muss >= 1 sein")
+
+    stmt = dialect_insert(db, InvoiceNumberCounter).values(
+        uuid=uuid.uuid4(),
+        serie=serie,
+        letzte_nummer=count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[InvoiceNumberCounter.serie],
+        set_={
+            "letzte_nummer": InvoiceNumberCounter.letzte_nummer + count,
+            "updated_at": func.now(),
+        },
+    ).returning(InvoiceNumberCounter.letzte_nummer)
+
+    last = db.execute(stmt).scalar_one()
+    return [format_invoice_number(serie, n) for n in range(last - count + 1, last + 1)]
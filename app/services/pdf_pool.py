@@ -0,0 +1,154 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, NamedTuple
+
+from app.services.pdf_service import copy_pdf
+from app.services.render_cache import get_render_cache, render_key
+from app.services.render_payload import build_render_payload, invoice_pdf_path
+
+logger = logging.getLogger(__name__)
+
+# Anzahl Render-Prozesse (0 = Anzahl CPU-Kerne)
+RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "0")) or (os.cpu_count() or 1)
+# "spawn" ist sicher in Streamlit (mehrere Threads im Elternprozess)
+START_METHOD = os.getenv("PDF_RENDER_START_METHOD", "spawn")
+
+# Zustand eines Worker-Prozesses, einmal in _init_worker befüllt
+_worker = {}
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+class RenderResult(NamedTuple):
+    nummer: str
+    path: str | None
+    error: str | None = None
+
+
+def _init_worker():
+    """Lädt WeasyPrint, Template, Schriften und CSS einmal pro Prozess statt pro Rechnung."""
+    from app.services.pdf_service import get_render_context
+
+    ctx = get_render_context()
+    ctx.template  # kompiliert das Template bzw. lädt es aus dem Bytecode-Cache
+    # Warm-up: Fontconfig-Suche und erstes Layout laufen hier, nicht bei der ersten Rechnung
+    ctx.write_pdf("<p>warm-up</p>")
+    _worker["context"] = ctx
+
+
+def _render_in_worker(payload: dict) -> RenderResult:
+    try:
+        ctx = _worker["context"]
+        file_path = invoice_pdf_path(payload)
+        tmp = f"{file_path}.{os.getpid()}.tmp"
+        ctx.write_pdf(ctx.render_html(payload), tmp)
+        os.replace(tmp, file_path)
+        return RenderResult(payload["nummer"], file_path)
+    except Exception as e:  # Fehler einer Rechnung dürfen den Batch nicht abbrechen
+        return RenderResult(payload["nummer"], None, f"{type(e).__name__}: {e}")
+
+
+def get_render_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Langlebiger Prozesspool, damit die Worker zwischen Aufrufen warm bleiben.
+
+    Wird eine andere Worker-Zahl verlangt als beim Anlegen, wird der Pool ersetzt.
+    """
+    global _pool, _pool_workers
+    workers = max_workers or RENDER_WORKERS
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_init_worker,
+            )
+            _pool_workers = workers
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _discard_pool(executor: ProcessPoolExecutor, error: BrokenProcessPool) -> str:
+    """Verwirft einen kaputten Pool (z.B. Initializer fehlgeschlagen), damit der nächste Aufruf neu startet."""
+    global _pool
+    logger.error("Render-Pool unbrauchbar: %s", error)
+    with _pool_lock:
+        if _pool is executor:
+            _pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+    return f"{type(error).__name__}: {error}"
+
+
+def render_invoices(
+    items: Iterable,
+    executor: ProcessPoolExecutor | None = None,
+    max_in_flight: int | None = None,
+) -> Iterator[RenderResult]:
+    """Rendert viele Rechnungen parallel und liefert jedes Ergebnis, sobald es fertig ist.
+
+    `items` dürfen ORM-Rechnungen (mit geladenen Positionen/Kunde, siehe
+    `invoice_loader.load_render_invoices`) oder Render-Payloads sein. Treffer
+    im Render-Cache werden ohne Worker sofort geliefert. Es sind höchstens
+    `max_in_flight` Aufträge gleichzeitig unterwegs (Standard: 2 × Worker des
+    gemeinsamen Pools), damit der Speicher auch bei großen Läufen begrenzt
+    bleibt. Fällt der Pool aus, erhalten die offenen und alle weiteren nicht
+    gecachten Rechnungen ein `RenderResult` mit Fehler.
+    """
+    if executor is None:
+        executor = get_render_pool()
+    if max_in_flight is None:
+        max_in_flight = 2 * (_pool_workers if executor is _pool else RENDER_WORKERS)
+    cache = get_render_cache()
+
+    pending = {}  # future -> (cache key, nummer)
+    broken = None  # Fehlertext, sobald der Pool ausgefallen ist
+
+    def _collect(done):
+        nonlocal broken
+        for future in done:
+            key, nummer = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                broken = broken or _discard_pool(executor, e)
+                yield RenderResult(nummer, None, broken)
+                continue
+            if result.path:
+                cache.put_file(key, result.path)
+            yield result
+
+    for item in items:
+        payload = item if isinstance(item, dict) else build_render_payload(item)
+        key = render_key(payload)
+        cached_path = cache.get(key)
+        if cached_path:
+            file_path = invoice_pdf_path(payload)
+            copy_pdf(cached_path, file_path)
+            yield RenderResult(payload["nummer"], file_path)
+            continue
+        if broken:
+            yield RenderResult(payload["nummer"], None, broken)
+            continue
+
+        try:
+            pending[executor.submit(_render_in_worker, payload)] = (key, payload["nummer"])
+        except BrokenProcessPool as e:
+            broken = _discard_pool(executor, e)
+            yield RenderResult(payload["nummer"], None, broken)
+            continue
+        if len(pending) >= max_in_flight:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _collect(done)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        yield from _collect(done)
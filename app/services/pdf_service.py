@@ -1,24 +1,190 @@
+import logging
 import os
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.services.instrumentation import phase
+from app.services.render_cache import get_render_cache, render_key
+from app.services.render_payload import build_render_payload, invoice_pdf_path
+
+if TYPE_CHECKING:
+    from weasyprint import CSS
+
+logger = logging.getLogger(__name__)
 
 # Ordner, in dem deine Templates liegen
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+TEMPLATE_NAME = "invoice_template.html"
+STYLESHEET_PATH = os.path.join(TEMPLATE_DIR, "invoice.css")
+
+# Persistenter Jinja-Bytecode-Cache (überlebt Neustarts)
+BYTECODE_CACHE_DIR = os.path.join(os.getenv("RENDER_CACHE_DIR", ".cache"), "jinja")
+
+
+class RenderContext:
+    """Langlebiger Render-Zustand: kompiliertes Template, Schriften und geparstes CSS.
+
+    Template und CSS werden anhand der mtime neu geladen, wenn sie sich ändern.
+    WeasyPrint (Cairo/Pango, Font-Suche) wird erst beim ersten PDF geladen –
+    Cache-Treffer und reines HTML-Rendern kommen ohne aus.
+    """
+
+    def __init__(self):
+        os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            bytecode_cache=FileSystemBytecodeCache(BYTECODE_CACHE_DIR),
+            auto_reload=True,  # prüft die mtime des Templates bei get_template
+        )
+        self._font_config = None
+        self._stylesheet = None
+        self._stylesheet_mtime = None
+        # WeasyPrint/Pango teilen sich font_config – Renderings im Prozess serialisieren
+        self._lock = threading.Lock()
+
+    @property
+    def template(self):
+        return self.env.get_template(TEMPLATE_NAME)
+
+    @property
+    def font_config(self):
+        if self._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+
+            self._font_config = FontConfiguration()
+        return self._font_config
+
+    def stylesheet(self) -> "CSS":
+        from weasyprint import CSS
+
+        mtime = os.stat(STYLESHEET_PATH).st_mtime_ns
+        if mtime != self._stylesheet_mtime:
+            self._stylesheet = CSS(filename=STYLESHEET_PATH, font_config=self.font_config)
+            self._stylesheet_mtime = mtime
+        return self._stylesheet
+
+    def render_html(self, invoice) -> str:
+        positions = invoice["positions"] if isinstance(invoice, dict) else invoice.positions
+        with phase("jinja"):
+            return self.template.render(invoice=invoice, positions=positions)
+
+    def write_pdf(self, html_content: str, target=None):
+        """Rendert HTML zu PDF; ohne `target` werden die Bytes zurückgegeben."""
+        with phase("weasyprint"), self._lock:
+            from weasyprint import HTML
+
+            return HTML(string=html_content).write_pdf(
+                target,
+                stylesheets=[self.stylesheet()],
+                font_config=self.font_config,
+            )
+
+
+_context = None
+_context_lock = threading.Lock()
+
+# Schreibt PDFs nach invoices/ bzw. in den Cache, ohne den Aufrufer zu blockieren
+_persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-persist")
+
+
+def get_render_context() -> RenderContext:
+    """Prozessweiter Render-Kontext, wird beim ersten Aufruf angelegt."""
+    global _context
+    with _context_lock:
+        if _context is None:
+            _context = RenderContext()
+        return _context
+
+
+def render_invoice_html(invoice) -> str:
+    """Rendert das HTML für eine Rechnung (ORM-Objekt oder Render-Payload)."""
+    return get_render_context().render_html(invoice)
+
 
 def generate_invoice_pdf(invoice) -> str:
-    """Erzeugt ein PDF für die gegebene Rechnung und gibt den Dateipfad zurück."""
-    # Lade HTML-Template
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    template = env.get_template("invoice_template.html")
+    """Erzeugt ein PDF für die gegebene Rechnung und gibt den Dateipfad zurück.
 
-    # Daten für das Template vorbereiten
-    html_content = template.render(invoice=invoice, positions=invoice.positions)
+    `invoice` ist ein ORM-Objekt oder ein Render-Payload, z.B. aus
+    `invoice_snapshot.load_snapshot_payload`. Unveränderte Rechnungen (gleiche
+    Daten, gleiches Template/CSS) kommen aus dem Render-Cache, ohne WeasyPrint
+    anzufassen.
+    """
+    with phase("payload"):
+        payload = invoice if isinstance(invoice, dict) else build_render_payload(invoice)
+    file_path = invoice_pdf_path(payload)
 
-    # Zielordner nach Jahr/Monat
-    output_dir = os.path.join("invoices", invoice.monat)
-    os.makedirs(output_dir, exist_ok=True)
-    file_path = os.path.join(output_dir, f"{invoice.nummer}.pdf")
+    cache = get_render_cache()
+    with phase("render_cache"):
+        key = render_key(payload)
+        cached_path = cache.get(key)
+    if cached_path:
+        copy_pdf(cached_path, file_path)
+        return file_path
 
     # HTML → PDF rendern
-    HTML(string=html_content).write_pdf(file_path)
+    ctx = get_render_context()
+    tmp = _tmp_path(file_path)
+    ctx.write_pdf(ctx.render_html(payload), tmp)
+    os.replace(tmp, file_path)
+    cache.put_file(key, file_path)
     return file_path
+
+
+def _tmp_path(file_path: str) -> str:
+    # prozesseindeutig: App (Persist-Thread) und Job-Worker schreiben ggf. dieselbe Rechnung
+    return f"{file_path}.{os.getpid()}.tmp"
+
+
+def copy_pdf(source_path: str, file_path: str) -> None:
+    """Kopiert eine PDF (z.B. aus dem Render-Cache) atomar an ihren Zielpfad."""
+    tmp = _tmp_path(file_path)
+    shutil.copyfile(source_path, tmp)
+    os.replace(tmp, file_path)
+
+
+def _persist_pdf(data: bytes, file_path: str | None, key: str | None):
+    try:
+        if key is not None:
+            get_render_cache().put_bytes(key, data)
+        if file_path is not None:
+            tmp = _tmp_path(file_path)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, file_path)
+    except OSError:
+        logger.exception("PDF konnte nicht gespeichert werden: %s", file_path)
+
+
+def render_invoice_pdf_bytes(invoice, persist: bool = False) -> bytes:
+    """Rendert die Rechnung im Speicher und gibt die PDF-Bytes zurück.
+
+    Mit `persist=True` wird zusätzlich `invoices/<monat>/<nummer>.pdf`
+    geschrieben – asynchron, der Aufrufer wartet nicht auf die Platte.
+    """
+    with phase("payload"):
+        payload = invoice if isinstance(invoice, dict) else build_render_payload(invoice)
+    file_path = invoice_pdf_path(payload) if persist else None
+
+    with phase("render_cache"):
+        key = render_key(payload)
+        cached_path = get_render_cache().get(key)
+    if cached_path:
+        with open(cached_path, "rb") as f:
+            data = f.read()
+        key = None  # schon im Cache
+    else:
+        ctx = get_render_context()
+        data = ctx.write_pdf(ctx.render_html(payload))
+
+    if key is not None or file_path is not None:
+        _persist_executor.submit(_persist_pdf, data, file_path, key)
+    return data
+
+
+def wait_for_pdf_writes():
+    """Wartet, bis alle asynchronen PDF-Schreibvorgänge abgeschlossen sind."""
+    _persist_executor.submit(lambda: None).result()
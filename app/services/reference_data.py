@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import defaultdict
+
+from cachetools import TTLCache
+from sqlalchemy import or_, select, tuple_
+
+from app.db.session import SessionLocal
+from app.db.models import Customer, PositionTemplate
+
+# Stammdaten ändern sich selten – Seiten-Reruns sollen nicht jedes Mal Neon abfragen
+CACHE_TTL_SECONDS = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "256"))
+PAGE_SIZE = 25
+
+_cache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+# Versionszähler je Scope: (tabelle, "list") für Listen, (tabelle, id) für
+# Einzelzeilen. Ein Schreibzugriff erhöht nur die betroffenen Zähler; alte
+# Einträge sind damit unerreichbar und laufen per TTL/LRU aus.
+_versions = defaultdict(int)
+_MISSING = object()
+
+_CUSTOMER_COLUMNS = (
+    Customer.id,
+    Customer.name,
+    Customer.adresse,
+    Customer.standard_currency,
+    Customer.company_number,
+    Customer.vat_number,
+    Customer.tax_number,
+)
+_TEMPLATE_COLUMNS = (
+    PositionTemplate.id,
+    PositionTemplate.name,
+    PositionTemplate.beschreibung,
+    PositionTemplate.standard_menge,
+    PositionTemplate.einzelpreis,
+    PositionTemplate.waehrung,
+    PositionTemplate.attachment_path,
+)
+
+
+def _cached(scope: tuple, key, loader):
+    with _lock:
+        cache_key = (scope, _versions[scope], key)
+        value = _cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = loader()
+    with _lock:
+        # nur ablegen, wenn zwischenzeitlich nicht invalidiert wurde
+        if cache_key[1] == _versions[scope]:
+            _cache[cache_key] = value
+    return value
+
+
+def _fetch_all(stmt) -> list:
+    with SessionLocal() as db:
+        # Rows sind unveränderlich und können gefahrlos zwischen Sessions geteilt werden
+        return db.execute(stmt).all()
+
+
+def _fetch_one(stmt):
+    with SessionLocal() as db:
+        return db.execute(stmt).first()
+
+
+def list_customers() -> list:
+    """Alle Kunden (nach Name), als unveränderliche Rows."""
+    return _cached(
+        (Customer.__tablename__, "list"), "all",
+        lambda: _fetch_all(select(*_CUSTOMER_COLUMNS).order_by(Customer.name)),
+    )
+
+
+def get_customer(customer_id: int):
+    return _cached(
+        (Customer.__tablename__, customer_id), "row",
+        lambda: _fetch_one(select(*_CUSTOMER_COLUMNS).where(Customer.id == customer_id)),
+    )
+
+
+def list_position_templates() -> list:
+    """Alle Positionsvorlagen (nach Name), als unveränderliche Rows."""
+    return _cached(
+        (PositionTemplate.__tablename__, "list"), "all",
+        lambda: _fetch_all(select(*_TEMPLATE_COLUMNS).order_by(PositionTemplate.name)),
+    )
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _page_stmt(columns, name_col, id_col, search_cols, search: str, after, limit: int):
+    """Keyset-Pagination über (name, id); Suche per ILIKE (Trigram-Index auf Postgres)."""
+    stmt = select(*columns)
+    if search:
+        pattern = f"%{_escape_like(search)}%"
+        stmt = stmt.where(or_(*(col.ilike(pattern, escape="\\") for col in search_cols)))
+    if after is not None:
+        stmt = stmt.where(tuple_(name_col, id_col) > tuple_(*after))
+    # eine Zeile mehr laden, um zu wissen, ob es eine nächste Seite gibt
+    return stmt.order_by(name_col, id_col).limit(limit + 1)
+
+
+def page_customers(search: str = "", after: tuple[str, int] | None = None, limit: int = PAGE_SIZE):
+    """Eine Seite Kunden nach (Name, ID) ab dem Cursor `after`; Suche in Name und USt-IdNr.
+
+    Gibt (rows, has_next) zurück.
+    """
+    search = search.strip()
+    rows = _cached(
+        (Customer.__tablename__, "list"), ("page", search, after, limit),
+        lambda: _fetch_all(_page_stmt(
+            _CUSTOMER_COLUMNS, Customer.name, Customer.id,
+            (Customer.name, Customer.vat_number), search, after, limit,
+        )),
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def page_position_templates(search: str = "", after: tuple[str, int] | None = None, limit: int = PAGE_SIZE):
+    """Eine Seite Positionsvorlagen nach (Name, ID) ab dem Cursor `after`; Suche im Namen.
+
+    Gibt (rows, has_next) zurück.
+    """
+    search = search.strip()
+    rows = _cached(
+        (PositionTemplate.__tablename__, "list"), ("page", search, after, limit),
+        lambda: _fetch_all(_page_stmt(
+            _TEMPLATE_COLUMNS, PositionTemplate.name, PositionTemplate.id,
+            (PositionTemplate.name,), search, after, limit,
+        )),
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def _invalidate(table: str, row_id: int | None):
+    with _lock:
+        _versions[(table, "list")] += 1
+        if row_id is not None:
+            _versions[(table, row_id)] += 1
+
+
+def customers_changed(customer_id: int | None = None):
+    """Nach jedem Anlegen/Ändern/Löschen eines Kunden aufrufen (beim Anlegen ohne ID)."""
+    _invalidate(Customer.__tablename__, customer_id)
+
+
+def position_templates_changed(template_id: int | None = None):
+    """Nach jedem Anlegen/Ändern/Löschen einer Positionsvorlage aufrufen (beim Anlegen ohne ID)."""
+    _invalidate(PositionTemplate.__tablename__, template_id)
@@ -0,0 +1,247 @@
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.services.render_payload import build_render_payload
+
+# Inhaltsadressierter Cache fertiger PDFs: <CACHE_DIR>/<key[:2]>/<key>.pdf
+CACHE_DIR = os.path.join(os.getenv("RENDER_CACHE_DIR", ".cache"), "pdf")
+MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # 0 = aus
+INDEX_NAME = "index.json"
+# Zugriffszeiten aus Treffern höchstens so oft auf die Platte schreiben
+INDEX_FLUSH_SECONDS = 30
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+_FINGERPRINT_FILES = (
+    os.path.join(_TEMPLATE_DIR, "invoice_template.html"),
+    os.path.join(_TEMPLATE_DIR, "invoice.css"),
+)
+_fingerprint = (None, None)  # (mtimes, hash)
+
+
+def template_fingerprint() -> str:
+    """Hash über Template und CSS; wird nur neu berechnet, wenn sich eine mtime ändert."""
+    global _fingerprint
+    mtimes = tuple(os.stat(p).st_mtime_ns for p in _FINGERPRINT_FILES)
+    if _fingerprint[0] != mtimes:
+        h = hashlib.sha256()
+        for p in _FINGERPRINT_FILES:
+            with open(p, "rb") as f:
+                h.update(f.read())
+        _fingerprint = (mtimes, h.hexdigest())
+    return _fingerprint[1]
+
+
+def _normalize(value):
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"nicht serialisierbar: {type(value).__name__}")
+
+
+def render_key(invoice) -> str:
+    """Cache-Schlüssel aus normalisiertem Render-Payload und Template-Fingerprint."""
+    payload = invoice if isinstance(invoice, dict) else build_render_payload(invoice)
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=_normalize)
+    return hashlib.sha256(f"{template_fingerprint()}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Größenbegrenzter PDF-Cache mit LRU-Verdrängung und Indexdatei.
+
+    Mehrere Prozesse teilen sich Verzeichnis und Index (App, Job-Worker,
+    render_month.py). Jeder Prozess hält eine Kopie des Index im Speicher und
+    führt sie beim Schreiben unter einer Dateisperre mit dem Stand auf der
+    Platte zusammen; verdrängt wird erst danach, über alle Prozesse hinweg.
+    Beim Start wird der Index gegen das Verzeichnis abgeglichen, so dass
+    Dateien abgestürzter Prozesse nicht dauerhaft am Größenlimit vorbeilaufen.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(directory, INDEX_NAME)
+        self._lock_path = os.path.join(directory, INDEX_NAME + ".lock")
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        self._entries = {}
+        self._total = 0
+        if self.enabled:
+            with self._lock, self._index_lock():
+                self._entries = self._scan(self._load_index())
+                self._total = sum(e["size"] for e in self._entries.values())
+                self._evict()
+                self._write_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @contextmanager
+    def _index_lock(self):
+        """Exklusive Sperre über alle Prozesse für Lesen-Zusammenführen-Schreiben des Index."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _scan(self, entries: dict) -> dict:
+        """Index an den Verzeichnisinhalt angleichen: fehlende Dateien raus, verwaiste rein."""
+        found = {}
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                if not f.name.endswith(".pdf"):
+                    continue
+                key = f.name[:-4]
+                st = f.stat()
+                # ohne Indexeintrag zählt die mtime als letzter Zugriff
+                atime = entries.get(key, {}).get("atime", st.st_mtime)
+                found[key] = {"size": st.st_size, "atime": atime}
+        return found
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def _merge(self) -> None:
+        """Eigene Einträge mit dem Index auf der Platte zusammenführen (Sperre muss gehalten werden).
+
+        Einträge, die nur auf einer Seite stehen, bleiben nur, wenn die Datei
+        noch existiert – so setzen sich Verdrängungen anderer Prozesse durch.
+        """
+        disk = self._load_index()
+        merged = {}
+        for key in disk.keys() | self._entries.keys():
+            ours, theirs = self._entries.get(key), disk.get(key)
+            if ours is not None and theirs is not None:
+                merged[key] = {"size": ours["size"], "atime": max(ours["atime"], theirs["atime"])}
+            elif os.path.exists(self._path(key)):
+                merged[key] = ours or theirs
+        self._entries = merged
+        self._total = sum(e["size"] for e in merged.values())
+
+    def _write_index(self):
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"  # prozesseindeutig wie bei den PDFs
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _sync(self):
+        """Zusammenführen, verdrängen, schreiben (Thread-Sperre muss gehalten werden)."""
+        with self._index_lock():
+            self._merge()
+            self._evict()
+            self._write_index()
+
+    def _maybe_sync(self):
+        # Index höchstens alle INDEX_FLUSH_SECONDS schreiben, sofort nur bei Überschreitung
+        if self._total > self.max_bytes or time.monotonic() - self._last_flush > INDEX_FLUSH_SECONDS:
+            self._sync()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._sync()
+
+    def get(self, key: str) -> str | None:
+        """Pfad der gecachten PDF oder None."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                if entry is not None:
+                    # Datei wurde außerhalb gelöscht oder verdrängt – Eintrag verwerfen
+                    self._total -= self._entries.pop(key)["size"]
+                    self._dirty = True
+                return None
+            if entry is None:
+                # von einem anderen Prozess geschrieben, bei uns noch nicht im Index
+                entry = self._entries[key] = {"size": size}
+                self._total += size
+            entry["atime"] = time.time()
+            self._dirty = True
+            self._maybe_sync()
+            return path
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._register(key, len(data))
+
+    def put_file(self, key: str, source_path: str) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, tmp)
+        os.replace(tmp, path)
+        self._register(key, os.path.getsize(path))
+
+    def _register(self, key: str, size: int):
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self._total -= old["size"]
+            self._entries[key] = {"size": size, "atime": time.time()}
+            self._total += size
+            self._dirty = True
+            self._maybe_sync()
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["atime"]):
+            if self._total <= self.max_bytes:
+                break
+            self._total -= self._entries.pop(key)["size"]
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache()
+            atexit.register(_cache.flush)
+        return _cache
@@ -0,0 +1,105 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+
+# Ablage der Rechnungs-PDFs; laufen Worker und App auf verschiedenen Hosts oder in
+# verschiedenen Verzeichnissen, auf ein gemeinsames Verzeichnis setzen
+INVOICE_DIR = os.path.abspath(os.getenv("INVOICE_DIR", "invoices"))
+
+# Version des Snapshot-Dokuments (invoice_snapshot.dokument); bei Formatänderungen erhöhen
+SNAPSHOT_VERSION = 1
+
+_DECIMAL_FIELDS = ("gesamtbetrag",)
+_POSITION_DECIMAL_FIELDS = ("menge", "einzelpreis", "betrag")
+
+
+def _position_payload(p) -> dict:
+    return {
+        "beschreibung": p.beschreibung,
+        "menge": p.menge,
+        "einzelpreis": p.einzelpreis,
+        "waehrung": p.waehrung,
+        # Teil des Payloads und damit des Render-Cache-Schlüssels: neue Felder machen
+        # alle gecachten PDFs einmalig ungültig
+        "betrag": p.menge * p.einzelpreis,
+        "attachment_path": p.attachment_path,
+    }
+
+
+def build_render_payload(invoice, customer=None, positions=None) -> dict:
+    """Wandelt eine Rechnung (ORM-Objekt) in ein einfaches, picklebares Dict für das Template um.
+
+    Das Template greift per `invoice.customer.name` usw. zu; Jinja löst das auf
+    Dicts genauso auf wie auf ORM-Objekten. `customer`/`positions` können
+    übergeben werden, wenn sie schon vorliegen (vermeidet Lazy-Loads).
+    """
+    customer = customer if customer is not None else invoice.customer
+    positions = positions if positions is not None else invoice.positions
+    return {
+        "nummer": invoice.nummer,
+        "monat": invoice.monat,
+        "created_at": invoice.created_at,
+        "gesamtbetrag": invoice.gesamtbetrag,
+        "zielwaehrung": invoice.zielwaehrung,
+        "status": invoice.status,
+        "customer": {
+            "name": customer.name,
+            "adresse": customer.adresse,
+            "company_number": customer.company_number,
+            "vat_number": customer.vat_number,
+            "tax_number": customer.tax_number,
+        },
+        "positions": [_position_payload(p) for p in positions],
+    }
+
+
+def payload_to_document(payload: dict) -> dict:
+    """Render-Payload -> JSON-taugliches Snapshot-Dokument (Decimal als String, Datum ISO)."""
+    doc = dict(payload, version=SNAPSHOT_VERSION)
+    for name in _DECIMAL_FIELDS:
+        if doc[name] is not None:
+            doc[name] = str(doc[name])
+    if doc["created_at"] is not None:
+        doc["created_at"] = doc["created_at"].isoformat()
+    doc["positions"] = [
+        {k: str(v) if k in _POSITION_DECIMAL_FIELDS else v for k, v in p.items()}
+        for p in payload["positions"]
+    ]
+    return doc
+
+
+def payload_from_document(doc: dict) -> dict:
+    """Snapshot-Dokument -> Render-Payload, wie ihn `build_render_payload` liefert."""
+    payload = {k: v for k, v in doc.items() if k != "version"}
+    for name in _DECIMAL_FIELDS:
+        if payload[name] is not None:
+            payload[name] = Decimal(payload[name])
+    if payload["created_at"] is not None:
+        payload["created_at"] = datetime.fromisoformat(payload["created_at"])
+    payload["positions"] = [
+        {k: Decimal(v) if k in _POSITION_DECIMAL_FIELDS else v for k, v in p.items()}
+        for p in doc["positions"]
+    ]
+    return payload
+
+
+def invoice_pdf_path(invoice) -> str:
+    """Zielpfad `<INVOICE_DIR>/<monat>/<nummer>.pdf`; legt den Monatsordner an.
+
+    `invoice` darf ein ORM-Objekt oder ein Render-Payload (Dict) sein.
+    """
+    monat = invoice["monat"] if isinstance(invoice, dict) else invoice.monat
+    nummer = invoice["nummer"] if isinstance(invoice, dict) else invoice.nummer
+    output_dir = os.path.join(INVOICE_DIR, monat)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{nummer}.pdf")
+
+
+def invoice_file_key(path: str) -> str:
+    """Pfad relativ zu INVOICE_DIR – so in Job-Ergebnissen abgelegt, unabhängig vom CWD des Workers."""
+    return os.path.relpath(path, INVOICE_DIR)
+
+
+def invoice_file_path(key: str) -> str:
+    """Gegenstück zu `invoice_file_key` im lesenden Prozess."""
+    return os.path.join(INVOICE_DIR, key)
@@ -0,0 +1,121 @@
+import logging
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Invoice, RevenueSummary
+from app.db.upsert import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Rechnungen in diesen Status zählen nicht zum Umsatz
+NON_REVENUE_STATUSES = ("Entwurf", "storniert")
+
+
+def counts_as_revenue(status: str | None) -> bool:
+    return status not in NON_REVENUE_STATUSES
+
+
+def book_revenue(db: Session, invoices: Iterable[tuple], sign: int = 1):
+    """Schreibt die Umsatzübersicht für (kunde_id, monat, zielwaehrung, gesamtbetrag)-Tupel fort.
+
+    `sign=-1` bucht wieder aus (z.B. bei Storno). Die Deltas werden je
+    Schlüssel zusammengefasst und per Upsert atomar addiert; committet
+    wird vom Aufrufer, zusammen mit der Rechnung selbst.
+    """
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    for kunde_id, monat, zielwaehrung, gesamtbetrag in invoices:
+        delta = deltas[(kunde_id, monat, zielwaehrung)]
+        delta[0] += sign
+        delta[1] += sign * Decimal(gesamtbetrag or 0)
+    if not deltas:
+        return
+    if sign < 0:
+        _book_out(db, deltas)
+        return
+
+    stmt = dialect_insert(db, RevenueSummary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RevenueSummary.kunde_id, RevenueSummary.monat, RevenueSummary.zielwaehrung],
+        set_={
+            "anzahl_rechnungen": RevenueSummary.anzahl_rechnungen + stmt.excluded.anzahl_rechnungen,
+            "umsatz": RevenueSummary.umsatz + stmt.excluded.umsatz,
+            "updated_at": func.now(),
+        },
+    )
+    # feste Reihenfolge, damit parallele Buchungen die Zeilen gleich sperren
+    db.execute(stmt, [
+        {"uuid": uuid.uuid4(), "kunde_id": kunde_id, "monat": monat, "zielwaehrung": zielwaehrung,
+         "anzahl_rechnungen": anzahl, "umsatz": umsatz}
+        for (kunde_id, monat, zielwaehrung), (anzahl, umsatz) in sorted(deltas.items())
+    ])
+
+
+def _book_out(db: Session, deltas: dict):
+    """Verringert vorhandene Zeilen; ein Upsert würde fehlende Zeilen mit negativen Werten anlegen."""
+    for (kunde_id, monat, zielwaehrung), (anzahl, umsatz) in sorted(deltas.items()):
+        key = (RevenueSummary.kunde_id == kunde_id, RevenueSummary.monat == monat,
+               RevenueSummary.zielwaehrung == zielwaehrung)
+        updated = db.execute(
+            update(RevenueSummary)
+            .where(*key)
+            .values(anzahl_rechnungen=RevenueSummary.anzahl_rechnungen + anzahl,
+                    umsatz=RevenueSummary.umsatz + umsatz, updated_at=func.now())
+        ).rowcount
+        if not updated:
+            logger.warning("Umsatzübersicht ohne Zeile für Kunde %s, %s, %s – nichts ausgebucht; "
+                           "scripts/rebuild_revenue_summary.py gleicht ab", kunde_id, monat, zielwaehrung)
+            continue
+        db.execute(delete(RevenueSummary).where(*key, RevenueSummary.anzahl_rechnungen <= 0))
+
+
+def book_invoice(db: Session, invoice: Invoice, sign: int = 1):
+    """Bucht eine einzelne Rechnung, sofern ihr Status zum Umsatz zählt."""
+    if counts_as_revenue(invoice.status):
+        book_revenue(db, [(invoice.kunde_id, invoice.monat, invoice.zielwaehrung, invoice.gesamtbetrag)], sign)
+
+
+def rebuild_revenue_summary(db: Session) -> int:
+    """Baut die Übersicht komplett aus `invoice` neu auf; gibt die Zahl der Zeilen zurück."""
+    db.execute(delete(RevenueSummary))
+    rows = db.execute(
+        select(
+            Invoice.kunde_id,
+            Invoice.monat,
+            Invoice.zielwaehrung,
+            func.count(),
+            func.coalesce(func.sum(Invoice.gesamtbetrag), 0),
+        )
+        .where(Invoice.status.not_in(NON_REVENUE_STATUSES))
+        .group_by(Invoice.kunde_id, Invoice.monat, Invoice.zielwaehrung)
+    ).all()
+    if rows:
+        db.execute(insert(RevenueSummary), [
+            {"uuid": uuid.uuid4(), "kunde_id": kunde_id, "monat": monat, "zielwaehrung": zielwaehrung,
+             "anzahl_rechnungen": anzahl, "umsatz": umsatz}
+            for kunde_id, monat, zielwaehrung, anzahl, umsatz in rows
+        ])
+    db.commit()
+    return len(rows)
+
+
+def revenue_rows(db: Session, monat_von: str, monat_bis: str, kunde_id: int | None = None) -> list:
+    """Übersichtszeilen im Monatsbereich (inkl.), ohne `invoice` anzufassen."""
+    stmt = (
+        select(
+            RevenueSummary.monat,
+            RevenueSummary.kunde_id,
+            RevenueSummary.zielwaehrung,
+            RevenueSummary.anzahl_rechnungen,
+            RevenueSummary.umsatz,
+        )
+        .where(RevenueSummary.monat >= monat_von, RevenueSummary.monat <= monat_bis)
+        .order_by(RevenueSummary.monat, RevenueSummary.kunde_id, RevenueSummary.zielwaehrung)
+    )
+    if kunde_id is not None:
+        stmt = stmt.where(RevenueSummary.kunde_id == kunde_id)
+    return db.execute(stmt).all()
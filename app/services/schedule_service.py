@@ -0,0 +1,220 @@
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import Integer, String, bindparam, column, exists, func, select, tuple_, update, values
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.models import Invoice, InvoiceSchedule, InvoiceSchedulePosition
+from app.services.billing_service import (
+    DEFAULT_CHUNK_SIZE,
+    load_billing_customers,
+    prepare_invoice,
+    write_invoices,
+)
+from app.services.exchange_rate_service import month_rate_date
+from app.services.instrumentation import traced
+from app.services.numbering_service import series_for_year
+
+logger = logging.getLogger(__name__)
+
+# Kandidaten pro IN-Abfrage im Fallback ohne Postgres
+LOOKUP_CHUNK = 500
+
+
+@dataclass
+class ScheduleRunResult:
+    """Ergebnis eines Scheduler-Laufs."""
+    bis_monat: str
+    due: list[tuple[int, str]] = field(default_factory=list)  # (schedule_id, monat)
+    created: list[tuple[int, str, str]] = field(default_factory=list)  # (schedule_id, monat, nummer)
+    failed: list[tuple[int, str, str]] = field(default_factory=list)  # (schedule_id, monat, fehler)
+    seconds: float = 0.0
+
+
+def month_index(monat: str) -> int:
+    """"YYYY-MM" -> fortlaufender Monatsindex (Jahr * 12 + Monat - 1)."""
+    return int(monat[:4]) * 12 + int(monat[5:7]) - 1
+
+
+def month_from_index(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def next_period_after(schedule, bis_monat: str) -> str:
+    """Erste Periode der Serie nach `bis_monat` (im Raster von start_monat und Intervall)."""
+    start = month_index(schedule.start_monat)
+    bis = month_index(bis_monat)
+    if bis < start:
+        return schedule.start_monat
+    steps = (bis - start) // schedule.intervall_monate + 1
+    return month_from_index(start + steps * schedule.intervall_monate)
+
+
+def _window_end(schedule, bis_monat: str) -> str:
+    if schedule.end_monat and schedule.end_monat < bis_monat:
+        return schedule.end_monat
+    return bis_monat
+
+
+def _due_postgres(db: Session, schedules, bis_monat: str) -> list[tuple[int, str]]:
+    """Perioden per generate_series, Anti-Join über uq_invoice_schedule_id_monat – ein Statement.
+
+    Die Serien kommen als VALUES-Liste aus dem geladenen Stand, nicht erneut aus der Tabelle.
+    """
+    serien = values(
+        column("schedule_id", Integer), column("von", String), column("bis", String), column("intervall", Integer),
+        name="serien",
+    ).data([(s.id, s.naechste_periode, _window_end(s, bis_monat), s.intervall_monate) for s in schedules])
+    perioden = func.generate_series(
+        func.to_date(serien.c.von, "YYYY-MM"), func.to_date(serien.c.bis, "YYYY-MM"),
+        func.make_interval(0, serien.c.intervall),
+    )
+    faellig = (
+        select(serien.c.schedule_id, func.to_char(perioden, "YYYY-MM").label("monat"))
+        .subquery("faellig")
+    )
+    stmt = (
+        select(faellig.c.schedule_id, faellig.c.monat)
+        .where(~exists().where(Invoice.schedule_id == faellig.c.schedule_id, Invoice.monat == faellig.c.monat))
+        .order_by(faellig.c.monat, faellig.c.schedule_id)
+    )
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def _due_generic(db: Session, schedules, bis_monat: str) -> list[tuple[int, str]]:
+    """Fallback (SQLite): Perioden in Python, vorhandene Rechnungen per Index-Lookup der Kandidaten."""
+    candidates = [
+        (s.id, month_from_index(i))
+        for s in schedules
+        for i in range(month_index(s.naechste_periode), month_index(_window_end(s, bis_monat)) + 1,
+                       s.intervall_monate)
+    ]
+    invoiced = set()
+    for i in range(0, len(candidates), LOOKUP_CHUNK):
+        chunk = candidates[i:i + LOOKUP_CHUNK]
+        invoiced.update(tuple(row) for row in db.execute(
+            select(Invoice.schedule_id, Invoice.monat).where(tuple_(Invoice.schedule_id, Invoice.monat).in_(chunk))
+        ))
+    return sorted((c for c in candidates if c not in invoiced), key=lambda c: (c[1], c[0]))
+
+
+def load_due_schedules(db: Session, bis_monat: str, with_positions: bool = False) -> list[InvoiceSchedule]:
+    """Aktive Serien mit Prüffenster bis `bis_monat`; optional inkl. Positionen und Vorlagen."""
+    stmt = select(InvoiceSchedule).where(
+        InvoiceSchedule.aktiv.is_(True), InvoiceSchedule.naechste_periode <= bis_monat
+    )
+    if with_positions:
+        stmt = stmt.options(selectinload(InvoiceSchedule.positions).selectinload(InvoiceSchedulePosition.template))
+    return db.execute(stmt).scalars().all()
+
+
+def due_periods(db: Session, bis_monat: str, schedules=None) -> list[tuple[int, str]]:
+    """Fällige, noch nicht abgerechnete Perioden aller aktiven Serien bis einschließlich `bis_monat`.
+
+    Geprüft wird je Serie erst ab `naechste_periode`; ältere Perioden sind
+    abgerechnet. `schedules` (aus `load_due_schedules`) legt den Stand fest,
+    gegen den geprüft wird. Sortiert nach (monat, schedule_id).
+    """
+    if schedules is None:
+        schedules = load_due_schedules(db, bis_monat)
+    if not schedules:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _due_postgres(db, schedules, bis_monat)
+    return _due_generic(db, schedules, bis_monat)
+
+
+def _schedule_positions(schedule) -> list[dict]:
+    return [
+        {
+            "beschreibung": p.template.beschreibung,
+            "menge": p.menge if p.menge is not None else p.template.standard_menge,
+            "einzelpreis": p.einzelpreis if p.einzelpreis is not None else p.template.einzelpreis,
+            "waehrung": p.template.waehrung,
+            "attachment_path": p.template.attachment_path,
+        }
+        for p in schedule.positions
+    ]
+
+
+def _advance_watermarks(db: Session, watermarks: dict[int, tuple[str, str]], failed: list[tuple[int, str, str]]):
+    """Setzt naechste_periode: erste fehlgeschlagene Periode, sonst die Periode nach dem Lauf.
+
+    `watermarks`: schedule_id -> (Stand beim Laden, neuer Stand). Nur Serien,
+    deren naechste_periode seit dem Laden unverändert ist, werden verschoben –
+    zwischenzeitlich geänderte Serien prüft der nächste Lauf ab ihrem neuen Stand.
+    """
+    first_failed = {}
+    for schedule_id, monat, _ in failed:
+        first_failed[schedule_id] = min(monat, first_failed.get(schedule_id, monat))
+    rows = [
+        {"b_id": schedule_id, "b_alt": alt, "b_neu": first_failed.get(schedule_id, neu)}
+        for schedule_id, (alt, neu) in watermarks.items()
+    ]
+    if rows:
+        table = InvoiceSchedule.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.naechste_periode == bindparam("b_alt"))
+            .values(naechste_periode=bindparam("b_neu")),
+            rows,
+        )
+    db.commit()
+
+
+@traced("schedule_run")
+def run_schedules(db: Session, bis_monat: str | None = None, dry_run: bool = False,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> ScheduleRunResult:
+    """Erstellt alle fälligen Serienrechnungen bis `bis_monat` (Standard: aktueller Monat).
+
+    Verpasste Perioden werden im selben Lauf nachgeholt, älteste zuerst.
+    Mehrfaches Ausführen ist unschädlich: der eindeutige Index auf
+    (schedule_id, monat) lässt keine zweite Rechnung je Periode zu – auch
+    nicht bei parallelen Läufen.
+    """
+    bis_monat = bis_monat or date.today().strftime("%Y-%m")
+    result = ScheduleRunResult(bis_monat=bis_monat)
+    start = time.perf_counter()
+
+    # ein Stand für alles: fällige Perioden, Positionen und neue Wasserstände kommen aus derselben Abfrage
+    schedules = load_due_schedules(db, bis_monat, with_positions=not dry_run)
+    result.due = due_periods(db, bis_monat, schedules)
+    if dry_run:
+        result.seconds = time.perf_counter() - start
+        return result
+
+    # alles Nötige vor dem ersten Commit auslesen – danach sind die ORM-Objekte abgelaufen
+    kunden = {s.id: s.kunde_id for s in schedules}
+    positions = {s.id: _schedule_positions(s) for s in schedules}
+    watermarks = {s.id: (s.naechste_periode, next_period_after(s, _window_end(s, bis_monat))) for s in schedules}
+    customers = load_billing_customers(db, set(kunden.values()))
+
+    by_month = defaultdict(list)
+    for schedule_id, monat in result.due:
+        by_month[monat].append(schedule_id)
+
+    for monat, schedule_ids in sorted(by_month.items()):
+        year, month = int(monat[:4]), int(monat[5:7])
+        rate_date = month_rate_date(year, month)
+        prepared = []
+        for schedule_id in schedule_ids:
+            try:
+                if kunden[schedule_id] not in customers:
+                    raise ValueError("Kunde nicht gefunden")
+                prepared.append(prepare_invoice(db, customers[kunden[schedule_id]], positions[schedule_id],
+                                                rate_date, schedule_id=schedule_id))
+            except ValueError as e:  # inkl. fehlender Wechselkurse
+                result.failed.append((schedule_id, monat, str(e)))
+
+        created, failed = write_invoices(db, prepared, monat, series_for_year(year), chunk_size)
+        result.created.extend((item["schedule_id"], monat, nummer) for item, nummer in created)
+        result.failed.extend((item["schedule_id"], monat, fehler) for item, fehler in failed)
+
+    _advance_watermarks(db, watermarks, result.failed)
+    result.seconds = time.perf_counter() - start
+    logger.info("Serienrechnungen bis %s: %d fällig, %d erstellt, %d fehlgeschlagen",
+                bis_monat, len(result.due), len(result.created), len(result.failed))
+    return result
@@ -0,0 +1,245 @@
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterator
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Customer, PositionTemplate
+
+logger = logging.getLogger(__name__)
+
+# Zeilen pro gelesenem Block – bestimmt den Speicherbedarf, nicht die Dateigröße
+CHUNK_ROWS = 100_000
+
+# Spaltennamen im Export -> interne Namen; per `columns` überschreibbar
+DEFAULT_COLUMNS = {
+    "kunde": "kunde",  # Kunden-ID oder exakter Kundenname
+    "projekt": "projekt",
+    "stunden": "stunden",
+    "satz": "stundensatz",
+    "waehrung": "waehrung",  # optional
+    "vorlage": "vorlage",  # optional: Vorlagen-ID oder -Name; sonst wird das Projekt als Name versucht
+    "datum": "datum",  # optional: filtert auf den Abrechnungsmonat
+}
+REQUIRED = ("kunde", "projekt", "stunden")
+GROUP_KEYS = ["kunde", "projekt", "vorlage", "satz", "waehrung"]
+
+# Datumsformate der `datum`-Spalte (pandas-Format -> Anzeige); nie raten lassen, sonst
+# hängt die Deutung (Tag/Monat) vom ersten Wert jedes Blocks ab
+DATE_FORMATS = {
+    "ISO8601": "JJJJ-MM-TT",
+    "%d.%m.%Y": "TT.MM.JJJJ",
+    "%d/%m/%Y": "TT/MM/JJJJ",
+    "%m/%d/%Y": "MM/TT/JJJJ",
+}
+DEFAULT_DATE_FORMAT = "ISO8601"
+# Beispielwerte je ungültiger Spalte, die im Ergebnis gemeldet werden
+INVALID_SAMPLES = 5
+
+
+@dataclass
+class TimesheetResult:
+    """Aggregierte Zeiterfassung: Positionen je Kunde plus das, was nicht zuzuordnen war."""
+    positions: dict[int, list[dict]] = field(default_factory=dict)  # kunde_id -> Positionen
+    rows_read: int = 0
+    rows_used: int = 0
+    unknown_customers: dict[str, float] = field(default_factory=dict)  # Kunde -> Stunden
+    skipped: dict[int, list[str]] = field(default_factory=dict)  # kunde_id -> Projekte ohne Stundensatz
+    invalid_rows: dict[str, int] = field(default_factory=dict)  # Spalte (datum/stunden) -> Zeilen
+    invalid_samples: dict[str, list[str]] = field(default_factory=dict)  # Spalte -> erste ungültige Werte
+
+    def count_invalid(self, column: str, values: pd.Series):
+        if values.empty:
+            return
+        self.invalid_rows[column] = self.invalid_rows.get(column, 0) + len(values)
+        samples = self.invalid_samples.setdefault(column, [])
+        samples.extend(str(v) for v in values.head(INVALID_SAMPLES - len(samples)))
+
+
+def iter_timesheet_chunks(source, columns: dict[str, str] | None = None, sep: str = ",",
+                          decimal: str = ".", chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Liest eine CSV- oder Parquet-Datei blockweise; Spalten tragen die internen Namen.
+
+    `source` ist ein Pfad oder ein Dateiobjekt (z.B. Streamlit-Upload mit `.name`).
+    """
+    mapping = {**DEFAULT_COLUMNS, **(columns or {})}
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    if name.lower().endswith(".parquet"):
+        chunks = _iter_parquet(source, mapping, chunk_rows)
+    else:
+        chunks = _iter_csv(source, mapping, sep, decimal, chunk_rows)
+
+    rename = {external: internal for internal, external in mapping.items()}
+    for chunk in chunks:
+        chunk = chunk.rename(columns=rename)
+        missing = [c for c in REQUIRED if c not in chunk.columns]
+        if missing:
+            raise ValueError("Spalten fehlen in der Zeiterfassung: "
+                             + ", ".join(mapping[c] for c in missing))
+        yield chunk
+
+
+def _iter_csv(source, mapping: dict, sep: str, decimal: str, chunk_rows: int):
+    wanted = set(mapping.values())
+    numeric = [mapping["stunden"], mapping["satz"]]
+    reader = pd.read_csv(
+        source,
+        sep=sep,
+        chunksize=chunk_rows,
+        usecols=lambda c: c in wanted,  # übrige Spalten gar nicht erst parsen
+        # Zahlen als Text: mit `decimal` wandelt pandas sonst nur Blöcke ohne einen
+        # einzigen unlesbaren Wert um – der Rest würde ungültig
+        dtype={mapping["kunde"]: str, mapping["projekt"]: str, mapping["vorlage"]: str,
+               mapping["waehrung"]: str, **dict.fromkeys(numeric, str)},
+    )
+    for chunk in reader:
+        for column in numeric:
+            if column in chunk and decimal != ".":
+                chunk[column] = chunk[column].str.replace(decimal, ".", regex=False)
+        yield chunk
+
+
+def _iter_parquet(source, mapping: dict, chunk_rows: int):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Für Parquet-Zeiterfassungen wird 'pyarrow' benötigt.") from e
+
+    parquet = pq.ParquetFile(source)
+    columns = [c for c in parquet.schema_arrow.names if c in set(mapping.values())]
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def _parse_dates(values: pd.Series, date_format: str) -> pd.Series:
+    if date_format == "ISO8601":
+        return pd.to_datetime(values, format=date_format, errors="coerce")
+    # exact=False: Uhrzeit hinter dem Datum (z.B. "13.02.2025 08:30") ist erlaubt
+    return pd.to_datetime(values, format=date_format, errors="coerce", exact=False)
+
+
+def _normalize(chunk: pd.DataFrame, monat: str | None, date_format: str,
+               result: TimesheetResult) -> pd.DataFrame:
+    """Typen vereinheitlichen, Monat filtern – alles spaltenweise.
+
+    Nicht lesbare Stunden bzw. (bei Monatsfilter) Datumswerte werden in
+    `result` gezählt statt stillschweigend verworfen.
+    """
+    df = pd.DataFrame({
+        "kunde": chunk["kunde"].astype(str).str.strip(),
+        "projekt": chunk["projekt"].fillna("").astype(str).str.strip(),
+        "stunden": pd.to_numeric(chunk["stunden"], errors="coerce"),
+        "satz": pd.to_numeric(chunk["satz"], errors="coerce") if "satz" in chunk else float("nan"),
+        "waehrung": chunk["waehrung"].fillna("").astype(str).str.strip().str.upper()
+        if "waehrung" in chunk else "",
+        "vorlage": chunk["vorlage"].fillna("").astype(str).str.strip() if "vorlage" in chunk else "",
+    })
+    result.count_invalid("stunden", chunk["stunden"][df["stunden"].isna()].fillna(""))
+    if monat and "datum" in chunk:
+        datum = _parse_dates(chunk["datum"], date_format)
+        result.count_invalid("datum", chunk["datum"][datum.isna()].fillna(""))
+        df = df[datum.dt.strftime("%Y-%m") == monat]
+    # Sätze auf Cent-Bruchteile runden, damit Gleitkomma-Rauschen keine Extra-Gruppen erzeugt
+    df["satz"] = df["satz"].round(4)
+    return df[df["stunden"].notna() & (df["stunden"] != 0)]
+
+
+def aggregate_timesheet(chunks, monat: str | None = None, date_format: str = DEFAULT_DATE_FORMAT,
+                        result: TimesheetResult | None = None) -> tuple[pd.DataFrame, TimesheetResult]:
+    """Summiert Stunden je (Kunde, Projekt, Vorlage, Satz, Währung) über alle Blöcke.
+
+    Je Block wird vorab gruppiert; es bleibt nur das laufende Aggregat (eine
+    Zeile je Gruppe) im Speicher. Gibt das Aggregat und ein TimesheetResult mit
+    gelesenen, verwendeten und ungültigen Zeilen zurück.
+    """
+    result = result or TimesheetResult()
+    total = None
+    for chunk in chunks:
+        result.rows_read += len(chunk)
+        df = _normalize(chunk, monat, date_format, result)
+        result.rows_used += len(df)
+        partial = df.groupby(GROUP_KEYS, dropna=False, sort=False, as_index=False)["stunden"].sum()
+        if total is not None:
+            partial = (pd.concat([total, partial], ignore_index=True)
+                       .groupby(GROUP_KEYS, dropna=False, sort=False, as_index=False)["stunden"].sum())
+        total = partial
+    if total is None:
+        return pd.DataFrame(columns=[*GROUP_KEYS, "stunden"]), result
+    return total, result
+
+
+def _customers(db: Session, keys) -> dict[str, tuple[int, str]]:
+    """Ordnet Kunden-Schlüssel (ID oder exakter Name) (Kunden-ID, Standardwährung) zu."""
+    keys = set(keys)
+    ids = [int(k) for k in keys if k.isdigit()]
+    names = [k for k in keys if not k.isdigit()]
+    columns = (Customer.id, Customer.name, Customer.standard_currency)
+    mapping = {}
+    if ids:
+        for cid, _, currency in db.execute(select(*columns).where(Customer.id.in_(ids))):
+            mapping[str(cid)] = (cid, currency)
+    if names:
+        for cid, name, currency in db.execute(select(*columns).where(Customer.name.in_(names))):
+            mapping[name] = (cid, currency)
+    return mapping
+
+
+def _templates(db: Session) -> tuple[dict[str, PositionTemplate], dict[str, PositionTemplate]]:
+    rows = db.execute(select(PositionTemplate)).scalars().all()
+    return {str(t.id): t for t in rows}, {t.name.strip().lower(): t for t in rows}
+
+
+def build_positions(db: Session, aggregate: pd.DataFrame,
+                    result: TimesheetResult | None = None) -> TimesheetResult:
+    """Macht aus dem Aggregat Positionen je Kunde, wie sie run_billing bzw.
+    create_invoice_with_positions erwarten.
+
+    Vorlage per `vorlage`-Spalte (ID oder Name) oder, ersatzweise, per
+    Projektname. Sie liefert Beschreibung, Anhang und – wenn die Zeiterfassung
+    keine enthält – Stundensatz und Währung; ohne Vorlage gilt die Währung des Kunden.
+    """
+    result = result or TimesheetResult()
+    customers = _customers(db, aggregate["kunde"].unique())
+    by_id, by_name = _templates(db)
+
+    for row in aggregate.itertuples(index=False):  # eine Zeile je Gruppe, nicht je Buchung
+        if row.kunde not in customers:
+            result.unknown_customers[row.kunde] = result.unknown_customers.get(row.kunde, 0.0) + row.stunden
+            continue
+        kunde_id, kunden_waehrung = customers[row.kunde]
+
+        template = (by_id.get(row.vorlage) or by_name.get(row.vorlage.lower())
+                    or by_name.get(row.projekt.lower()))
+        satz = row.satz if pd.notna(row.satz) else (template.einzelpreis if template else None)
+        if satz is None:
+            result.skipped.setdefault(kunde_id, []).append(f"{row.projekt}: kein Stundensatz und keine Vorlage")
+            continue
+
+        if template is None:
+            beschreibung = row.projekt
+        elif row.projekt and row.projekt.lower() != template.name.strip().lower():
+            beschreibung = f"{template.beschreibung} – {row.projekt}"
+        else:
+            beschreibung = template.beschreibung
+        result.positions.setdefault(kunde_id, []).append({
+            "beschreibung": beschreibung or "Leistungen laut Zeiterfassung",
+            "menge": Decimal(str(round(row.stunden, 2))),
+            "einzelpreis": Decimal(str(satz)),
+            "waehrung": row.waehrung or (template.waehrung if template else kunden_waehrung),
+            "attachment_path": template.attachment_path if template else None,
+        })
+    return result
+
+
+def import_timesheet(db: Session, source, monat: str | None = None, date_format: str = DEFAULT_DATE_FORMAT,
+                     **read_options) -> TimesheetResult:
+    """Liest, aggregiert und ordnet eine Zeiterfassung zu (schreibt nichts)."""
+    aggregate, result = aggregate_timesheet(iter_timesheet_chunks(source, **read_options), monat, date_format)
+    build_positions(db, aggregate, result)
+    logger.info("Zeiterfassung: %d Zeilen gelesen, %d verwendet, %d ungültig, %d Kunden, %d Positionen",
+                result.rows_read, result.rows_used, sum(result.invalid_rows.values()), len(result.positions),
+                sum(len(p) for p in result.positions.values()))
+    return result
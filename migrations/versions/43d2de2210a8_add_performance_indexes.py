@@ -0,0 +1,39 @@
+"""add performance indexes
+
+Revision ID: 43d2de2210a8
+Revises: a55c1774ce84
+Create Date: 2026-02-10 16:41:09.662047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43d2de2210a8'
+down_revision: Union[str, Sequence[str], None] = 'a55c1774ce84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rechnungen je Kunde (und Monat); kunde_id vorne deckt auch reine Kunden-Lookups ab
+    op.create_index('ix_invoice_kunde_id_monat', 'invoice', ['kunde_id', 'monat'], unique=False)
+    op.create_index('ix_invoice_monat', 'invoice', ['monat'], unique=False)
+    # Schlägt fehl, falls durch die alte Nummernvergabe bereits Duplikate existieren –
+    # diese vorher bereinigen (SELECT nummer FROM invoice GROUP BY nummer HAVING count(*) > 1)
+    op.create_index('uq_invoice_nummer', 'invoice', ['nummer'], unique=True)
+    op.create_index('ix_invoice_position_invoice_id', 'invoice_position', ['invoice_id'], unique=False)
+    op.create_index('ix_exchange_rate_von_nach_datum', 'exchange_rate', ['von', 'nach', 'datum'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exchange_rate_von_nach_datum', table_name='exchange_rate')
+    op.drop_index('ix_invoice_position_invoice_id', table_name='invoice_position')
+    op.drop_index('uq_invoice_nummer', table_name='invoice')
+    op.drop_index('ix_invoice_monat', table_name='invoice')
+    op.drop_index('ix_invoice_kunde_id_monat', table_name='invoice')
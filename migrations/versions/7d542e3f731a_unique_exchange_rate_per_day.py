@@ -0,0 +1,42 @@
+"""unique exchange_rate per day
+
+Revision ID: 7d542e3f731a
+Revises: 43d2de2210a8
+Create Date: 2026-02-16 08:57:33.401276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d542e3f731a'
+down_revision: Union[str, Sequence[str], None] = '43d2de2210a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Doppelte Kurse (gleiches Paar, gleicher Tag) bereinigen, ältesten Eintrag behalten
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "DELETE FROM exchange_rate a USING exchange_rate b "
+            "WHERE a.von = b.von AND a.nach = b.nach AND a.datum = b.datum AND a.id > b.id"
+        )
+    else:
+        op.execute(
+            "DELETE FROM exchange_rate WHERE id NOT IN "
+            "(SELECT min(id) FROM exchange_rate GROUP BY von, nach, datum)"
+        )
+    op.drop_index('ix_exchange_rate_von_nach_datum', table_name='exchange_rate')
+    # Grundlage für ON CONFLICT DO NOTHING beim Import
+    op.create_index('uq_exchange_rate_von_nach_datum', 'exchange_rate', ['von', 'nach', 'datum'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_exchange_rate_von_nach_datum', table_name='exchange_rate')
+    op.create_index('ix_exchange_rate_von_nach_datum', 'exchange_rate', ['von', 'nach', 'datum'], unique=False)
@@ -0,0 +1,50 @@
+"""add invoice_number_counter
+
+Revision ID: 82340cf3d2e6
+Revises: da6104e86d48
+Create Date: 2026-02-02 09:14:27.518342
+
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82340cf3d2e6'
+down_revision: Union[str, Sequence[str], None] = 'da6104e86d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    counter = op.create_table('invoice_number_counter',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('serie', sa.String(), nullable=False),
+    sa.Column('letzte_nummer', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('serie'),
+    sa.UniqueConstraint('uuid')
+    )
+
+    # Bestehende Nummern übernehmen, damit der fortlaufende Kreis nahtlos weiterzählt
+    nummern = op.get_bind().execute(sa.text("SELECT nummer FROM invoice")).scalars()
+    letzte = max((int(n) for n in nummern if n and n.isdigit()), default=0)
+    # Zeitstempel explizit: der Server-Default now() existiert nur in Postgres
+    jetzt = datetime.now(timezone.utc)
+    op.bulk_insert(counter, [
+        {'uuid': uuid.uuid4(), 'created_at': jetzt, 'updated_at': jetzt, 'serie': 'fortlaufend',
+         'letzte_nummer': letzte},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('invoice_number_counter')
@@ -0,0 +1,56 @@
+"""add revenue_summary
+
+Revision ID: 8942630a2e33
+Revises: 7d542e3f731a
+Create Date: 2026-02-18 10:21:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8942630a2e33'
+down_revision: Union[str, Sequence[str], None] = '7d542e3f731a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('revenue_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('kunde_id', sa.Integer(), nullable=False),
+    sa.Column('monat', sa.String(), nullable=False),
+    sa.Column('zielwaehrung', sa.String(), nullable=False),
+    sa.Column('anzahl_rechnungen', sa.Integer(), nullable=False),
+    sa.Column('umsatz', sa.Numeric(), nullable=False),
+    sa.ForeignKeyConstraint(['kunde_id'], ['customer.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uuid')
+    )
+    op.create_index('uq_revenue_summary_kunde_monat_waehrung', 'revenue_summary', ['kunde_id', 'monat', 'zielwaehrung'], unique=True)
+    op.create_index('ix_revenue_summary_monat', 'revenue_summary', ['monat'], unique=False)
+
+    # Bestand einmalig aggregieren (entspricht scripts/rebuild_revenue_summary.py);
+    # andere Backends füllen die Tabelle per scripts/rebuild_revenue_summary.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "INSERT INTO revenue_summary (uuid, kunde_id, monat, zielwaehrung, anzahl_rechnungen, umsatz) "
+        "SELECT gen_random_uuid(), kunde_id, monat, zielwaehrung, count(*), coalesce(sum(gesamtbetrag), 0) "
+        "FROM invoice WHERE status NOT IN ('Entwurf', 'storniert') "
+        "GROUP BY kunde_id, monat, zielwaehrung"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_revenue_summary_monat', table_name='revenue_summary')
+    op.drop_index('uq_revenue_summary_kunde_monat_waehrung', table_name='revenue_summary')
+    op.drop_table('revenue_summary')
@@ -0,0 +1,46 @@
+"""add search and pagination indexes
+
+Revision ID: a55c1774ce84
+Revises: 82340cf3d2e6
+Create Date: 2026-02-09 11:02:45.193824
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a55c1774ce84'
+down_revision: Union[str, Sequence[str], None] = '82340cf3d2e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-Pagination über (name, id)
+    op.create_index('ix_customer_name_id', 'customer', ['name', 'id'], unique=False)
+    op.create_index('ix_position_template_name_id', 'position_template', ['name', 'id'], unique=False)
+
+    # Teilstring-Suche (ILIKE '%…%') über Trigram-Indizes – nur Postgres
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_customer_name_trgm', 'customer', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_customer_vat_number_trgm', 'customer', ['vat_number'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'vat_number': 'gin_trgm_ops'})
+    op.create_index('ix_position_template_name_trgm', 'position_template', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_position_template_name_trgm', table_name='position_template')
+        op.drop_index('ix_customer_vat_number_trgm', table_name='customer')
+        op.drop_index('ix_customer_name_trgm', table_name='customer')
+    op.drop_index('ix_position_template_name_id', table_name='position_template')
+    op.drop_index('ix_customer_name_id', table_name='customer')
@@ -0,0 +1,84 @@
+"""add invoice_snapshot
+
+Revision ID: c4171300a430
+Revises: 8942630a2e33
+Create Date: 2026-02-20 14:03:48.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4171300a430'
+down_revision: Union[str, Sequence[str], None] = '8942630a2e33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('invoice_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('nummer', sa.String(), nullable=False),
+    sa.Column('monat', sa.String(), nullable=False),
+    sa.Column('dokument', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoice.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('invoice_id'),
+    sa.UniqueConstraint('uuid')
+    )
+    op.create_index('uq_invoice_snapshot_nummer', 'invoice_snapshot', ['nummer'], unique=True)
+    op.create_index('ix_invoice_snapshot_monat', 'invoice_snapshot', ['monat'], unique=False)
+
+    # Abgeschlossene Bestandsrechnungen einfrieren (Format wie render_payload.payload_to_document, Version 1);
+    # nur Postgres – sonst greift für Rechnungen ohne Snapshot der Fallback in load_month_payloads
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("""
+        INSERT INTO invoice_snapshot (uuid, invoice_id, version, nummer, monat, dokument)
+        SELECT gen_random_uuid(), i.id, 1, i.nummer, i.monat, jsonb_build_object(
+            'version', 1,
+            'nummer', i.nummer,
+            'monat', i.monat,
+            'created_at', to_jsonb(i.created_at),
+            'gesamtbetrag', i.gesamtbetrag::text,
+            'zielwaehrung', i.zielwaehrung,
+            'status', i.status,
+            'customer', jsonb_build_object(
+                'name', c.name,
+                'adresse', c.adresse,
+                'company_number', c.company_number,
+                'vat_number', c.vat_number,
+                'tax_number', c.tax_number
+            ),
+            'positions', coalesce((
+                SELECT jsonb_agg(jsonb_build_object(
+                    'beschreibung', p.beschreibung,
+                    'menge', p.menge::text,
+                    'einzelpreis', p.einzelpreis::text,
+                    'waehrung', p.waehrung,
+                    'betrag', (p.menge * p.einzelpreis)::text,
+                    'attachment_path', p.attachment_path
+                ) ORDER BY p.id)
+                FROM invoice_position p WHERE p.invoice_id = i.id
+            ), '[]'::jsonb)
+        )
+        FROM invoice i JOIN customer c ON c.id = i.kunde_id
+        WHERE i.status <> 'Entwurf'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoice_snapshot_monat', table_name='invoice_snapshot')
+    op.drop_index('uq_invoice_snapshot_nummer', table_name='invoice_snapshot')
+    op.drop_table('invoice_snapshot')
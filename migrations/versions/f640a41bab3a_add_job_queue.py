@@ -0,0 +1,49 @@
+"""add job queue
+
+Revision ID: f640a41bab3a
+Revises: c4171300a430
+Create Date: 2026-02-23 11:47:12.905531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f640a41bab3a'
+down_revision: Union[str, Sequence[str], None] = 'c4171300a430'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('art', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('versuche', sa.Integer(), nullable=False),
+    sa.Column('max_versuche', sa.Integer(), nullable=False),
+    sa.Column('verfuegbar_ab', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('gestartet_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('beendet_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('worker', sa.String(), nullable=True),
+    sa.Column('ergebnis', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=True),
+    sa.Column('fehler', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uuid')
+    )
+    op.create_index('ix_job_status_verfuegbar_ab', 'job', ['status', 'verfuegbar_ab'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_status_verfuegbar_ab', table_name='job')
+    op.drop_table('job')
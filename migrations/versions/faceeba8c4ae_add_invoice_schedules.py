@@ -0,0 +1,71 @@
+"""add invoice schedules
+
+Revision ID: faceeba8c4ae
+Revises: f640a41bab3a
+Create Date: 2026-02-26 09:14:37.402816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'faceeba8c4ae'
+down_revision: Union[str, Sequence[str], None] = 'f640a41bab3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('invoice_schedule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('kunde_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('intervall_monate', sa.Integer(), nullable=False),
+    sa.Column('start_monat', sa.String(), nullable=False),
+    sa.Column('end_monat', sa.String(), nullable=True),
+    sa.Column('naechste_periode', sa.String(), nullable=False),
+    sa.Column('aktiv', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['kunde_id'], ['customer.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uuid')
+    )
+    op.create_index('ix_invoice_schedule_kunde_id', 'invoice_schedule', ['kunde_id'], unique=False)
+    op.create_table('invoice_schedule_position',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('template_id', sa.Integer(), nullable=False),
+    sa.Column('menge', sa.Numeric(), nullable=True),
+    sa.Column('einzelpreis', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_id'], ['invoice_schedule.id'], ),
+    sa.ForeignKeyConstraint(['template_id'], ['position_template.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uuid')
+    )
+    op.create_index('ix_invoice_schedule_position_schedule_id', 'invoice_schedule_position', ['schedule_id'], unique=False)
+    # Batch-Modus: SQLite kann Fremdschlüssel nur per Tabellenkopie ergänzen, Postgres nutzt ALTER TABLE
+    with op.batch_alter_table('invoice') as batch_op:
+        batch_op.add_column(sa.Column('schedule_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('invoice_schedule_id_fkey', 'invoice_schedule', ['schedule_id'], ['id'])
+    op.create_index('uq_invoice_schedule_id_monat', 'invoice', ['schedule_id', 'monat'], unique=True, postgresql_where=sa.text('schedule_id IS NOT NULL'), sqlite_where=sa.text('schedule_id IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_invoice_schedule_id_monat', table_name='invoice', postgresql_where=sa.text('schedule_id IS NOT NULL'), sqlite_where=sa.text('schedule_id IS NOT NULL'))
+    with op.batch_alter_table('invoice') as batch_op:
+        batch_op.drop_constraint('invoice_schedule_id_fkey', type_='foreignkey')
+        batch_op.drop_column('schedule_id')
+    op.drop_index('ix_invoice_schedule_position_schedule_id', table_name='invoice_schedule_position')
+    op.drop_table('invoice_schedule_position')
+    op.drop_index('ix_invoice_schedule_kunde_id', table_name='invoice_schedule')
+    op.drop_table('invoice_schedule')
@@ -0,0 +1,89 @@
+# scripts/bench_render.py
+"""Misst die Renderzeit pro Rechnung: alter Pfad (alles pro Aufruf neu) vs. RenderContext.
+
+    python scripts/bench_render.py --runs 50 --positions 10
+
+Benötigt keine Datenbank; gerendert wird eine synthetische Rechnung.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from jinja2 import Environment, FileSystemLoader
+from weasyprint import HTML
+
+from app.services.pdf_service import STYLESHEET_PATH, TEMPLATE_DIR, TEMPLATE_NAME, get_render_context
+
+
+def _payload(n_positions: int) -> dict:
+    positions = [
+        {
+            "beschreibung": f"Beratung Modul {i}",
+            "menge": Decimal("1.5"),
+            "einzelpreis": Decimal("120.00"),
+            "waehrung": "EUR",
+            "attachment_path": None,
+        }
+        for i in range(n_positions)
+    ]
+    return {
+        "nummer": "00042",
+        "monat": "2026-01",
+        "created_at": datetime(2026, 1, 31),
+        "gesamtbetrag": sum(p["menge"] * p["einzelpreis"] for p in positions),
+        "zielwaehrung": "EUR",
+        "status": "versendet",
+        "customer": {"name": "Beispiel GmbH", "adresse": "Musterstraße 1, 12345 Musterstadt, DE"},
+        "positions": positions,
+    }
+
+
+def _render_uncached(payload: dict, css_text: str) -> bytes:
+    """Bisheriger Ablauf: neues Environment, Template-Parse und Inline-CSS bei jedem Aufruf."""
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+    template = env.get_template(TEMPLATE_NAME)
+    html_content = template.render(invoice=payload, positions=payload["positions"])
+    html_content = html_content.replace("</head>", f"<style>{css_text}</style></head>", 1)
+    return HTML(string=html_content).write_pdf()
+
+
+def _render_cached(payload: dict) -> bytes:
+    ctx = get_render_context()
+    return ctx.write_pdf(ctx.render_html(payload))
+
+
+def _measure(fn, runs: int) -> list[float]:
+    fn()  # erster Aufruf (Import/Fontsuche) nicht mitzählen
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderzeit pro Rechnung vorher/nachher messen.")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--positions", type=int, default=10)
+    args = parser.parse_args()
+
+    payload = _payload(args.positions)
+    with open(STYLESHEET_PATH, encoding="utf-8") as f:
+        css_text = f.read()
+
+    before = _measure(lambda: _render_uncached(payload, css_text), args.runs)
+    after = _measure(lambda: _render_cached(payload), args.runs)
+
+    for label, times in (("vorher (pro Aufruf neu)", before), ("nachher (RenderContext)", after)):
+        print(f"{label:<26} median {statistics.median(times):7.1f} ms   "
+              f"p95 {sorted(times)[int(len(times) * 0.95) - 1]:7.1f} ms")
+    print(f"Faktor: {statistics.median(before) / statistics.median(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
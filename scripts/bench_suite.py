@@ -0,0 +1,270 @@
+# scripts/bench_suite.py
+"""Benchmark der heißen Pfade bei mehreren Datenmengen; Ergebnisse als JSON.
+
+    python scripts/bench_suite.py --database-url postgresql+psycopg://.../bench --scales 0.01,0.1,1
+    python scripts/bench_suite.py --database-url sqlite:///bench.db --scales 0.01,0.1 --out bench.json
+    python scripts/bench_suite.py ... --compare bench_baseline.json   # Exit 1 bei Regression
+
+Je Skala wird das Schema in der Zieldatenbank NEU ANGELEGT (drop_all/create_all),
+mit scripts/generate_data.py befüllt und dann gemessen:
+
+- generate_invoice_number, create_invoice_with_positions
+- generate_invoice_pdf (ohne Render-Cache; übersprungen, wenn WeasyPrint fehlt)
+- Seitendaten aus main.py (Kundenliste, Seiten/Suche, Vorlagen, Umsatz), kalt und warm
+- db_dump-Export von invoice_position als CSV
+
+Nur gegen eine eigene Benchmark-Datenbank laufen lassen!
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.engine import make_url
+
+# Render-Cache aus, Cache-/Ausgabedateien in ein Temp-Verzeichnis – vor den App-Importen
+_WORK_DIR = tempfile.mkdtemp(prefix="invoice-bench-")
+os.environ.setdefault("PDF_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("RENDER_CACHE_DIR", os.path.join(_WORK_DIR, ".cache"))
+
+# Verhältnis Median neu / Median Basislauf, ab dem --compare eine Regression meldet
+DEFAULT_TOLERANCE = 1.25
+# Abweichungen darunter gelten als Messrauschen (z.B. Cache-Treffer im µs-Bereich)
+MIN_DELTA_MS = 0.5
+
+
+def _stats(times: list[float], queries: list[int]) -> dict:
+    ordered = sorted(times)
+    return {
+        "runs": len(times),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        # Nearest-Rank: kleinster Wert, unter dem mindestens 95 % der Läufe liegen
+        "p95_ms": round(ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "queries_min": min(queries),
+        "queries_max": max(queries),
+        "queries": queries,  # je Lauf – z.B. kalt/warm unterscheiden sich hier
+    }
+
+
+def _measure(name: str, fn, runs: int, warmup: int = 1) -> dict:
+    from app.services.instrumentation import trace
+
+    for _ in range(warmup):
+        fn()
+    times = []
+    queries = []
+    for _ in range(runs):
+        with trace(f"bench:{name}") as t:
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        queries.append(t.queries)
+    return _stats(times, queries)
+
+
+def _reset_schema(engine):
+    from app.db.models import Base
+
+    Base.metadata.drop_all(engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    Base.metadata.create_all(engine)
+
+
+def _bench_scale(engine, scale: float, runs: int, seed: int) -> dict:
+    from sqlalchemy import func, select
+
+    from app.db.models import Customer, Invoice
+    from app.db.session import SessionLocal
+    from app.services import reference_data
+    from app.services.exchange_rate_service import invalidate_rate_table
+    from app.services.invoice_loader import load_render_invoices
+    from app.services.invoice_service import create_invoice_with_positions, generate_invoice_number
+    from app.services.revenue_service import rebuild_revenue_summary, revenue_rows
+    from db_dump import export
+    from generate_data import Volumes, generate
+
+    _reset_schema(engine)
+    volumes = Volumes.scaled(scale)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        counts = generate(conn, volumes, seed)
+    with SessionLocal() as db:
+        rebuild_revenue_summary(db)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    generate_seconds = time.perf_counter() - start
+
+    reference_data.customers_changed()
+    reference_data.position_templates_changed()
+    invalidate_rate_table()
+
+    rnd = random.Random(seed)
+    results = {}
+    with SessionLocal() as db:
+        customers = db.execute(select(Customer.id, Customer.standard_currency, Customer.name,
+                                      Customer.adresse, Customer.company_number, Customer.vat_number,
+                                      Customer.tax_number)).all()
+        last_month = db.execute(select(func.max(Invoice.monat))).scalar_one()
+        year, month = int(last_month[:4]), int(last_month[5:])
+
+        def _number():
+            generate_invoice_number(db, year)
+            db.commit()
+
+        def _create():
+            customer = rnd.choice(customers)
+            create_invoice_with_positions(db, customer, year, month, [
+                {"beschreibung": f"Beratung {i}", "menge": 1 + i, "einzelpreis": 95.5,
+                 "waehrung": customer.standard_currency}
+                for i in range(5)
+            ])
+
+        results["generate_invoice_number"] = _measure("generate_invoice_number", _number, runs)
+        results["create_invoice_with_positions"] = _measure("create_invoice_with_positions", _create, runs)
+
+        try:
+            # pdf_service lädt WeasyPrint erst beim Rendern – daher hier ausdrücklich prüfen
+            import weasyprint  # noqa: F401
+
+            from app.services.pdf_service import generate_invoice_pdf
+        except (ImportError, OSError) as e:  # WeasyPrint bzw. Pango/Cairo fehlen
+            results["generate_invoice_pdf"] = {"skipped": f"{type(e).__name__}: {e}"}
+        else:
+            invoices = load_render_invoices(db, monat=last_month)[:max(runs, 1)]
+            cycle = iter(invoices * (runs + 1))
+            results["generate_invoice_pdf"] = _measure("generate_invoice_pdf",
+                                                       lambda: generate_invoice_pdf(next(cycle)), runs)
+
+        search = customers[len(customers) // 2].name.split()[0]
+        page_loads = {
+            "list_customers": reference_data.list_customers,
+            "page_customers": lambda: reference_data.page_customers(),
+            "page_customers_search": lambda: reference_data.page_customers(search),
+            "list_position_templates": reference_data.list_position_templates,
+            "revenue_rows": lambda: revenue_rows(db, f"{year:04d}-01", last_month),
+        }
+        for name, load in page_loads.items():
+            def _cold(load=load):
+                reference_data.customers_changed()
+                reference_data.position_templates_changed()
+                load()
+            results[f"page:{name}:kalt"] = _measure(f"page:{name}:kalt", _cold, runs)
+            results[f"page:{name}:warm"] = _measure(f"page:{name}:warm", load, runs)
+
+        out_dir = os.path.join(_WORK_DIR, "dump")
+        os.makedirs(out_dir, exist_ok=True)
+        dump_runs = max(1, runs // 10)
+        results["db_dump:invoice_position:csv"] = _measure(
+            "db_dump", lambda: export(db, "invoice_position", "csv", out_dir), dump_runs, warmup=0)
+
+    return {
+        "scale": scale,
+        "counts": counts,
+        "generate_seconds": round(generate_seconds, 2),
+        "benchmarks": results,
+    }
+
+
+def _compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Benchmarks, deren Median über tolerance × Basislauf liegt."""
+    base = {
+        (entry["scale"], name): stats
+        for entry in baseline["results"]
+        for name, stats in entry["benchmarks"].items()
+    }
+    regressions = []
+    for entry in current["results"]:
+        for name, stats in entry["benchmarks"].items():
+            old = base.get((entry["scale"], name))
+            if not old or "median_ms" not in old or "median_ms" not in stats:
+                continue
+            ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+            if ratio > tolerance and stats["median_ms"] - old["median_ms"] > MIN_DELTA_MS:
+                regressions.append(
+                    f"Skala {entry['scale']}: {name} {old['median_ms']:.2f} -> {stats['median_ms']:.2f} ms "
+                    f"({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Rechnungs- und PDF-Pfade.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="eigene Benchmark-Datenbank (wird geleert!)")
+    parser.add_argument("--scales", default="0.01,0.1", help="Faktoren auf 10k Kunden/100k Rechnungen/1M Positionen")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--compare", help="JSON eines früheren Laufs als Basis")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("BENCH_DATABASE_URL oder --database-url angeben.")
+
+    url = make_url(args.database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        # relativer Pfad bliebe nach dem chdir unten nicht gültig
+        url = url.set(database=os.path.abspath(url.database))
+    # app.db.session liest DATABASE_URL beim Import
+    os.environ["DATABASE_URL"] = url.render_as_string(hide_password=False)
+    from app.db.session import get_engine
+
+    engine = get_engine()
+
+    cwd = os.getcwd()
+    os.chdir(_WORK_DIR)  # invoices/ und Exporte landen im Temp-Verzeichnis
+    try:
+        results = []
+        for scale in (float(s) for s in args.scales.split(",")):
+            print(f"Skala {scale} …", flush=True)
+            entry = _bench_scale(engine, scale, args.runs, args.seed)
+            results.append(entry)
+            for name, stats in entry["benchmarks"].items():
+                if "median_ms" in stats:
+                    queries = (str(stats["queries_min"]) if stats["queries_min"] == stats["queries_max"]
+                               else f"{stats['queries_min']}–{stats['queries_max']}")
+                    print(f"  {name:<40} median {stats['median_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms"
+                          f"  queries {queries}")
+                else:
+                    print(f"  {name:<40} übersprungen ({stats['skipped']})")
+    finally:
+        os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Ergebnisse: {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = _compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressionen:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("Keine Regressionen gegenüber", args.compare)
+
+
+if __name__ == "__main__":
+    main()
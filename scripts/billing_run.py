@@ -0,0 +1,87 @@
+# scripts/billing_run.py
+"""Monatlicher Sammellauf: erstellt Rechnungen für viele Kunden in einem Durchgang.
+
+Beispiele:
+    python scripts/billing_run.py --year 2026 --month 1 --spec positionen.json
+    python scripts/billing_run.py --year 2026 --month 1 --customers 1,2,3 --templates 4,5
+    python scripts/billing_run.py --year 2026 --month 1 --all-customers --templates 4
+
+Format von --spec: {"<kunde_id>": [{"beschreibung": ..., "menge": ..., "einzelpreis": ...,
+"waehrung": ..., "attachment_path": ...}, ...], ...}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.db.models import Customer, PositionTemplate
+from app.services.billing_service import DEFAULT_CHUNK_SIZE, run_billing
+
+
+def _parse_ids(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _template_positions(db, template_ids: list[int]) -> list[dict]:
+    templates = {
+        t.id: t
+        for t in db.execute(select(PositionTemplate).where(PositionTemplate.id.in_(template_ids))).scalars()
+    }
+    missing = [tid for tid in template_ids if tid not in templates]
+    if missing:
+        raise SystemExit(f"Unbekannte Vorlagen: {missing}")
+    return [
+        {
+            "beschreibung": templates[tid].beschreibung,
+            "menge": templates[tid].standard_menge,
+            "einzelpreis": templates[tid].einzelpreis,
+            "waehrung": templates[tid].waehrung,
+            "attachment_path": templates[tid].attachment_path,
+        }
+        for tid in template_ids
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rechnungen für viele Kunden in einem Lauf erstellen.")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--month", type=int, required=True)
+    parser.add_argument("--spec", help="JSON-Datei mit Positionen je Kunde")
+    parser.add_argument("--customers", type=_parse_ids, help="Kunden-IDs, kommagetrennt")
+    parser.add_argument("--all-customers", action="store_true")
+    parser.add_argument("--templates", type=_parse_ids, help="Vorlagen-IDs für alle gewählten Kunden")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    with SessionLocal() as db:
+        if args.spec:
+            with open(args.spec, encoding="utf-8") as f:
+                specs = {int(k): v for k, v in json.load(f).items()}
+        else:
+            if not args.templates:
+                parser.error("Ohne --spec muss --templates angegeben werden.")
+            if args.all_customers:
+                customer_ids = db.execute(select(Customer.id).order_by(Customer.id)).scalars().all()
+            elif args.customers:
+                customer_ids = args.customers
+            else:
+                parser.error("--customers oder --all-customers angeben.")
+            positions = _template_positions(db, args.templates)
+            specs = {kunde_id: positions for kunde_id in customer_ids}
+
+        result = run_billing(db, args.year, args.month, specs, chunk_size=args.chunk_size)
+
+    print(f"Monat {result.monat}: {len(result.created)} Rechnungen erstellt "
+          f"in {result.seconds:.2f}s ({result.invoices_per_second:.1f} Rechnungen/s)")
+    for kunde_id, fehler in result.failed:
+        print(f"  Kunde {kunde_id}: FEHLER {fehler}")
+
+
+if __name__ == "__main__":
+    main()
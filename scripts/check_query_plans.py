@@ -0,0 +1,176 @@
+# scripts/check_query_plans.py
+"""Prüft per EXPLAIN, dass die zentralen Abfragen der App Indizes nutzen.
+
+Legt in einer Transaktion synthetische Daten an, aktualisiert die Statistiken,
+lässt sich die Pläne der wichtigsten Abfragen geben und rollt am Ende alles
+zurück. Endet mit Exit-Code 1, wenn eine Abfrage per Seq Scan (Postgres) bzw.
+SCAN ohne Index (SQLite) auf einer großen Tabelle läuft.
+
+    DATABASE_URL=postgresql+psycopg://.../scratch python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --database-url sqlite:///plan_check.db --scale 0.2
+
+Nur gegen eine Test-/Scratch-Datenbank mit aktuellem Schema (alembic upgrade head) laufen lassen.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, tuple_
+from sqlalchemy.engine import Connection
+
+from app.db.models import Customer, ExchangeRate, Invoice, InvoicePosition
+
+# Tabellen, auf denen ein Seq Scan als Regression gilt
+LARGE_TABLES = {"customer", "invoice", "invoice_position", "exchange_rate"}
+
+# Datenmengen bei --scale 1
+BASE_CUSTOMERS = 2_000
+BASE_INVOICES = 40_000
+POSITIONS_PER_INVOICE = 3
+BASE_RATE_DAYS = 2_000
+CURRENCIES = ["USD", "GBP", "CHF", "JPY", "SEK"]
+CHUNK = 5_000
+
+
+def _insert_chunked(conn: Connection, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+
+
+def _seed(conn: Connection, scale: float) -> dict:
+    rnd = random.Random(42)
+    n_customers = max(1, int(BASE_CUSTOMERS * scale))
+    n_invoices = max(1, int(BASE_INVOICES * scale))
+    n_days = max(1, int(BASE_RATE_DAYS * scale))
+
+    customer_ids = conn.execute(
+        insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+        [
+            {"uuid": uuid.uuid4(), "name": f"Plancheck Kunde {i:06d}", "adresse": "Teststraße 1",
+             "standard_currency": "EUR", "vat_number": f"DE{i:09d}"}
+            for i in range(n_customers)
+        ],
+    ).scalars().all()
+
+    invoice_ids = []
+    for start in range(0, n_invoices, CHUNK):
+        invoice_ids += conn.execute(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True),
+            [
+                {"uuid": uuid.uuid4(), "nummer": f"PLANCHECK-{i:08d}",
+                 "monat": f"{2015 + i % 12:04d}-{1 + i % 12:02d}", "kunde_id": rnd.choice(customer_ids),
+                 "zielwaehrung": "EUR", "gesamtbetrag": 100, "status": "versendet"}
+                for i in range(start, min(start + CHUNK, n_invoices))
+            ],
+        ).scalars().all()
+
+    _insert_chunked(conn, InvoicePosition.__table__, (
+        {"uuid": uuid.uuid4(), "invoice_id": invoice_id, "beschreibung": "Beratung",
+         "menge": 1, "einzelpreis": 100, "waehrung": "EUR"}
+        for invoice_id in invoice_ids
+        for _ in range(POSITIONS_PER_INVOICE)
+    ))
+
+    day0 = datetime(2015, 1, 1)
+    _insert_chunked(conn, ExchangeRate.__table__, (
+        {"uuid": uuid.uuid4(), "datum": day0 + timedelta(days=d), "von": "EUR", "nach": cur,
+         "kurs": 1 + rnd.random()}
+        for d in range(n_days)
+        for cur in CURRENCIES
+    ))
+
+    return {"kunde_id": customer_ids[len(customer_ids) // 2], "invoice_id": invoice_ids[len(invoice_ids) // 2]}
+
+
+def key_queries(sample: dict) -> dict:
+    """Die Zugriffspfade der App, deren Pläne geprüft werden."""
+    return {
+        "rechnungen_kunde_monat": select(Invoice.id).where(
+            Invoice.kunde_id == sample["kunde_id"], Invoice.monat == "2020-06"),
+        "rechnungen_kunde": select(Invoice.id).where(Invoice.kunde_id == sample["kunde_id"]),
+        "rechnungen_monat": select(Invoice.id, Invoice.nummer).where(Invoice.monat == "2020-06"),
+        "rechnung_nach_nummer": select(Invoice.id).where(Invoice.nummer == "PLANCHECK-00000042"),
+        "positionen_rechnung": select(InvoicePosition.id).where(
+            InvoicePosition.invoice_id.in_([sample["invoice_id"], sample["invoice_id"] + 1])),
+        "kurs_stichtag": select(ExchangeRate.kurs).where(
+            ExchangeRate.von == "EUR", ExchangeRate.nach == "USD",
+            ExchangeRate.datum <= datetime(2016, 3, 1),
+        ).order_by(ExchangeRate.datum.desc()).limit(1),
+        "kunden_seite": select(Customer.id, Customer.name).where(
+            tuple_(Customer.name, Customer.id) > tuple_("Plancheck Kunde 000500", 0),
+        ).order_by(Customer.name, Customer.id).limit(26),
+    }
+
+
+def _pg_seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += _pg_seq_scans(child)
+    return found
+
+
+def _explain(conn: Connection, stmt) -> tuple[list[str], str]:
+    """Gibt (Tabellen mit vollem Scan, lesbarer Plan) zurück."""
+    sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        return _pg_seq_scans(plan[0]["Plan"]), json.dumps(plan[0]["Plan"], indent=1)
+
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    details = [r[-1] for r in rows]
+    scans = [
+        d.split()[1] for d in details
+        if d.startswith("SCAN ") and "USING" not in d and d.split()[1] in LARGE_TABLES
+    ]
+    return scans, "\n".join(details)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-Pläne der Kernabfragen prüfen.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor für die synthetische Datenmenge")
+    parser.add_argument("--verbose", action="store_true", help="Pläne ausgeben")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("DATABASE_URL oder --database-url angeben.")
+
+    engine = create_engine(args.database_url, future=True)
+    failures = []
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            sample = _seed(conn, args.scale)
+            conn.exec_driver_sql("ANALYZE")
+            for name, stmt in key_queries(sample).items():
+                scans, plan = _explain(conn, stmt)
+                status = "SEQ SCAN " + ", ".join(scans) if scans else "ok"
+                print(f"{name:<26} {status}")
+                if args.verbose or scans:
+                    print(plan)
+                if scans:
+                    failures.append(name)
+        finally:
+            trans.rollback()
+
+    if failures:
+        print(f"\n{len(failures)} Abfrage(n) ohne Index: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
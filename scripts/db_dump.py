@@ -1,12 +1,63 @@
 # scripts/db_dump.py
+"""Gibt die Tabellen aus – als Übersicht im Terminal oder gestreamt als Export.
+
+    python scripts/db_dump.py                                   # Übersicht (kleine Tabellen)
+    python scripts/db_dump.py --format csv --out export/
+    python scripts/db_dump.py --format parquet --out export/ --tables invoice invoice_position \\
+        --since 2025-01-01 --until 2026-01-01
+
+Im Exportmodus werden nur die Spalten selektiert und per `yield_per`
+(serverseitiger Cursor) blockweise gelesen und geschrieben; der
+Speicherbedarf hängt von `--batch-size` ab, nicht von der Tabellengröße.
+"""
 from __future__ import annotations
 
+import argparse
+import csv
+import json
+import os
+from datetime import date, datetime
 from typing import Iterable
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from sqlalchemy import DateTime, Integer, Numeric, select
 
 from app.db.session import SessionLocal
 from app.db.models import Customer, PositionTemplate, Invoice, InvoicePosition, ExchangeRate
 
+# Tabelle -> (Titel, Modell, Spalten, Spalte für --since/--until)
+TABLES = {
+    "customer": (
+        "CUSTOMERS", Customer,
+        ["id", "name", "standard_currency", "vat_number", "company_number", "tax_number"],
+        "created_at",
+    ),
+    "position_template": (
+        "POSITION_TEMPLATES", PositionTemplate,
+        ["id", "name", "beschreibung", "standard_menge", "einzelpreis", "waehrung", "attachment_path"],
+        "created_at",
+    ),
+    "invoice": (
+        "INVOICES", Invoice,
+        ["id", "nummer", "monat", "kunde_id", "zielwaehrung", "gesamtbetrag", "status"],
+        "created_at",
+    ),
+    "invoice_position": (
+        "INVOICE_POSITIONS", InvoicePosition,
+        ["id", "invoice_id", "beschreibung", "menge", "einzelpreis", "waehrung", "attachment_path"],
+        "created_at",
+    ),
+    "exchange_rate": (
+        "EXCHANGE_RATES", ExchangeRate,
+        ["id", "datum", "von", "nach", "kurs"],
+        "datum",
+    ),
+}
+FORMATS = ("table", "csv", "jsonl", "parquet")
+DEFAULT_BATCH_SIZE = 5_000
+# Numeric-Spalten haben keine feste Skala; für Parquet auf 10 Nachkommastellen
+PARQUET_DECIMAL_SCALE = 10
+
 
 def _fmt(v):
     """Pretty-print helper for Decimal/None."""
@@ -41,67 +92,134 @@ def _print_table(title: str, headers: list[str], rows: Iterable[Iterable]):
         print("(no rows)")
 
 
+def _select(table: str, since: date | None, until: date | None):
+    _, model, columns, date_column = TABLES[table]
+    stmt = select(*(getattr(model, c) for c in columns)).order_by(model.id)
+    if since is not None:
+        stmt = stmt.where(getattr(model, date_column) >= since)
+    if until is not None:
+        stmt = stmt.where(getattr(model, date_column) < until)
+    return stmt
+
+
+def _iter_batches(db, stmt, batch_size: int):
+    """Liefert Zeilenblöcke über einen serverseitigen Cursor."""
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    yield from result.partitions()
+
+
+def _json_default(v):
+    if isinstance(v, Decimal):
+        return str(v)  # exakt, ohne Float-Rundung
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    raise TypeError(f"Nicht serialisierbar: {type(v).__name__}")
+
+
+def _write_csv(path: str, headers: list[str], batches) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for batch in batches:
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def _write_jsonl(path: str, headers: list[str], batches) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in batches:
+            for row in batch:
+                f.write(json.dumps(dict(zip(headers, row)), default=_json_default, ensure_ascii=False))
+                f.write("\n")
+            count += len(batch)
+    return count
+
+
+def _parquet_schema(pa, model, headers: list[str]):
+    fields = []
+    for name in headers:
+        col_type = model.__table__.c[name].type
+        if isinstance(col_type, Integer):
+            pa_type = pa.int64()
+        elif isinstance(col_type, Numeric):
+            pa_type = pa.decimal128(38, PARQUET_DECIMAL_SCALE)
+        elif isinstance(col_type, DateTime):
+            pa_type = pa.timestamp("us", tz="UTC" if col_type.timezone else None)
+        else:
+            pa_type = pa.string()
+        fields.append(pa.field(name, pa_type))
+    return pa.schema(fields)
+
+
+def _write_parquet(path: str, headers: list[str], batches, model) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet-Export benötigt pyarrow (pip install pyarrow).")
+
+    schema = _parquet_schema(pa, model, headers)
+    quant = Decimal(1).scaleb(-PARQUET_DECIMAL_SCALE)
+    decimal_cols = [i for i, field in enumerate(schema) if pa.types.is_decimal(field.type)]
+
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            columns = [list(col) for col in zip(*batch)]
+            for i in decimal_cols:
+                columns[i] = [None if v is None else Decimal(v).quantize(quant, ROUND_HALF_EVEN) for v in columns[i]]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            count += len(batch)
+    return count
+
+
+def export(db, table: str, fmt: str, out_dir: str, since=None, until=None,
+           batch_size: int = DEFAULT_BATCH_SIZE) -> tuple[str, int]:
+    """Exportiert eine Tabelle gestreamt; gibt (Dateipfad, Zeilenzahl) zurück."""
+    _, model, headers, _ = TABLES[table]
+    path = os.path.join(out_dir, f"{table}.{fmt}")
+    batches = _iter_batches(db, _select(table, since, until), batch_size)
+    if fmt == "csv":
+        count = _write_csv(path, headers, batches)
+    elif fmt == "jsonl":
+        count = _write_jsonl(path, headers, batches)
+    else:
+        count = _write_parquet(path, headers, batches, model)
+    return path, count
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Tabellen anzeigen oder exportieren.")
+    parser.add_argument("--format", choices=FORMATS, default="table",
+                        help="table = Übersicht im Terminal (nur für kleine Tabellen)")
+    parser.add_argument("--out", default=".", help="Zielordner für den Export (eine Datei je Tabelle)")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES))
+    parser.add_argument("--since", type=_parse_date, help="ab Datum (inkl., created_at bzw. datum)")
+    parser.add_argument("--until", type=_parse_date, help="bis Datum (exkl.)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
     with SessionLocal() as db:
-        # Customers
-        customers = db.query(Customer).order_by(Customer.id).all()
-        _print_table(
-            "CUSTOMERS",
-            ["id", "name", "standard_currency", "vat_number", "company_number", "tax_number"],
-            [
-                (c.id, c.name, c.standard_currency, c.vat_number, c.company_number, c.tax_number)
-                for c in customers
-            ],
-        )
-
-        # Position Templates
-        templates = db.query(PositionTemplate).order_by(PositionTemplate.id).all()
-        _print_table(
-            "POSITION_TEMPLATES",
-            ["id", "name", "beschreibung", "standard_menge", "einzelpreis", "waehrung", "attachment_path"],
-            [
-                (t.id, t.name, t.beschreibung, t.standard_menge, t.einzelpreis, t.waehrung, t.attachment_path)
-                for t in templates
-            ],
-        )
-
-        # Invoices
-        invoices = db.query(Invoice).order_by(Invoice.id).all()
-        _print_table(
-            "INVOICES",
-            ["id", "nummer", "monat", "kunde_id", "zielwaehrung", "gesamtbetrag", "status"],
-            [
-                (inv.id, inv.nummer, inv.monat, inv.kunde_id, inv.zielwaehrung, inv.gesamtbetrag, inv.status)
-                for inv in invoices
-            ],
-        )
-
-        # Invoice Positions
-        positions = db.query(InvoicePosition).order_by(InvoicePosition.id).all()
-        _print_table(
-            "INVOICE_POSITIONS",
-            ["id", "invoice_id", "beschreibung", "menge", "einzelpreis", "waehrung", "attachment_path"],
-            [
-                (
-                    p.id,
-                    p.invoice_id,
-                    p.beschreibung,
-                    p.menge,
-                    p.einzelpreis,
-                    p.waehrung,
-                    p.attachment_path,
-                )
-                for p in positions
-            ],
-        )
-
-        # Exchange Rates
-        rates = db.query(ExchangeRate).order_by(ExchangeRate.id).all()
-        _print_table(
-            "EXCHANGE_RATES",
-            ["id", "datum", "von", "nach", "kurs"],
-            [(r.id, r.datum, r.von, r.nach, r.kurs) for r in rates],
-        )
+        if args.format == "table":
+            for table in args.tables:
+                title, _, headers, _ = TABLES[table]
+                _print_table(title, headers, db.execute(_select(table, args.since, args.until)).all())
+            return
+
+        os.makedirs(args.out, exist_ok=True)
+        for table in args.tables:
+            path, count = export(db, table, args.format, args.out, args.since, args.until, args.batch_size)
+            print(f"{table}: {count} Zeilen -> {path}")
 
 
 if __name__ == "__main__":
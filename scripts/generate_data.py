@@ -0,0 +1,244 @@
+# scripts/generate_data.py
+"""Erzeugt deterministisch synthetische Stammdaten, Rechnungen und Kurse per Bulk-INSERT.
+
+    python scripts/generate_data.py --customers 10000 --invoices 100000 --positions 1000000
+    python scripts/generate_data.py --scale 0.1          # 1k Kunden, 10k Rechnungen, 100k Positionen
+
+Gleicher --seed, gleiche Daten. Nur gegen eine leere Test-/Scratch-Datenbank
+mit aktuellem Schema laufen lassen (alembic upgrade head); der Nummernkreis
+und die Umsatzübersicht werden passend gesetzt.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Customer,
+    ExchangeRate,
+    Invoice,
+    InvoiceNumberCounter,
+    InvoicePosition,
+    PositionTemplate,
+)
+from app.services.numbering_service import GLOBAL_SERIES, format_invoice_number
+from app.services.revenue_service import rebuild_revenue_summary
+
+# Mengen bei --scale 1
+BASE_CUSTOMERS = 10_000
+BASE_INVOICES = 100_000
+BASE_POSITIONS = 1_000_000
+BASE_TEMPLATES = 200
+CHUNK = 5_000
+
+CURRENCIES = [("EUR", 70), ("USD", 15), ("GBP", 8), ("CHF", 7)]
+FOREIGN = ["USD", "GBP", "CHF", "JPY"]
+FIRST_MONTH = (2019, 1)
+_WORDS = ["Nord", "Süd", "Alpen", "Rhein", "Hansa", "Delta", "Nova", "Prisma", "Atlas", "Vektor"]
+_SERVICES = ["Beratung", "Entwicklung", "Wartung", "Schulung", "Hosting", "Lizenz", "Support"]
+
+
+@dataclass
+class Volumes:
+    customers: int
+    invoices: int
+    positions: int
+    templates: int
+
+    @classmethod
+    def scaled(cls, scale: float) -> "Volumes":
+        return cls(
+            customers=max(1, int(BASE_CUSTOMERS * scale)),
+            invoices=max(1, int(BASE_INVOICES * scale)),
+            positions=max(1, int(BASE_POSITIONS * scale)),
+            templates=max(1, int(BASE_TEMPLATES * min(scale, 1))),
+        )
+
+
+def _months(count: int) -> list[str]:
+    year, month = FIRST_MONTH
+    result = []
+    for _ in range(count):
+        result.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
+def _insert_chunked(conn: Connection, table, rows) -> int:
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            conn.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+def _customers(conn: Connection, rnd: random.Random, n: int) -> list[tuple[int, str]]:
+    currencies = [c for c, _ in CURRENCIES]
+    weights = [w for _, w in CURRENCIES]
+    result = []
+    for start in range(0, n, CHUNK):
+        rows = [
+            {
+                "uuid": uuid.UUID(int=rnd.getrandbits(128)),
+                "name": f"{rnd.choice(_WORDS)} {rnd.choice(_SERVICES)} {i:06d} GmbH",
+                "adresse": f"Musterstraße {i % 200 + 1}, {10000 + i % 89999} Musterstadt, DE",
+                "standard_currency": rnd.choices(currencies, weights)[0],
+                "vat_number": f"DE{100000000 + i}",
+                "company_number": f"HRB {10000 + i}",
+                "tax_number": None,
+            }
+            for i in range(start, min(start + CHUNK, n))
+        ]
+        ids = conn.execute(
+            insert(Customer).returning(Customer.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        result += [(cid, row["standard_currency"]) for cid, row in zip(ids, rows)]
+    return result
+
+
+def _templates(conn: Connection, rnd: random.Random, n: int) -> int:
+    return _insert_chunked(conn, PositionTemplate.__table__, (
+        {
+            "uuid": uuid.UUID(int=rnd.getrandbits(128)),
+            "name": f"{_SERVICES[i % len(_SERVICES)]} {i:04d}",
+            "beschreibung": f"{_SERVICES[i % len(_SERVICES)]} laut Vereinbarung, Paket {i}",
+            "standard_menge": Decimal(rnd.randint(1, 20)),
+            "einzelpreis": Decimal(rnd.randint(5000, 200000)) / 100,
+            "waehrung": rnd.choice(["EUR", "EUR", "EUR", "USD"]),
+            "attachment_path": None,
+        }
+        for i in range(n)
+    ))
+
+
+def _rates(conn: Connection, rnd: random.Random, months: list[str]) -> int:
+    start = datetime(*FIRST_MONTH, 1)
+    days = (datetime(int(months[-1][:4]), int(months[-1][5:]), 28) - start).days + 1
+    base = {"USD": 1.1, "GBP": 0.86, "CHF": 0.97, "JPY": 160.0}
+    return _insert_chunked(conn, ExchangeRate.__table__, (
+        {
+            "uuid": uuid.UUID(int=rnd.getrandbits(128)),
+            "datum": start + timedelta(days=d),
+            "von": "EUR",
+            "nach": cur,
+            "kurs": Decimal(str(round(base[cur] * (1 + rnd.uniform(-0.05, 0.05)), 6))),
+        }
+        for d in range(days)
+        for cur in FOREIGN
+    ))
+
+
+def _invoices(conn: Connection, rnd: random.Random, volumes: Volumes,
+              customers: list[tuple[int, str]], months: list[str]) -> tuple[int, int]:
+    """Rechnungen chunkweise; Positionen folgen direkt je Chunk (konstanter Speicher)."""
+    avg_positions = volumes.positions / volumes.invoices
+    positions_total = 0
+    for start in range(0, volumes.invoices, CHUNK):
+        stop = min(start + CHUNK, volumes.invoices)
+        rows, position_lists = [], []
+        for i in range(start, stop):
+            kunde_id, currency = rnd.choice(customers)
+            # 1 .. 2*avg-1 Positionen, im Mittel avg_positions
+            n_pos = max(1, round(rnd.uniform(1, 2 * avg_positions - 1)))
+            positions = [
+                {
+                    "uuid": uuid.UUID(int=rnd.getrandbits(128)),
+                    "beschreibung": f"{rnd.choice(_SERVICES)} {rnd.choice(_WORDS)}",
+                    "menge": Decimal(rnd.randint(1, 40)),
+                    "einzelpreis": Decimal(rnd.randint(1000, 50000)) / 100,
+                    "waehrung": currency,
+                    "attachment_path": None,
+                }
+                for _ in range(n_pos)
+            ]
+            position_lists.append(positions)
+            rows.append({
+                "uuid": uuid.UUID(int=rnd.getrandbits(128)),
+                "nummer": format_invoice_number(GLOBAL_SERIES, i + 1),
+                "monat": months[i * len(months) // volumes.invoices],
+                "kunde_id": kunde_id,
+                "zielwaehrung": currency,
+                "gesamtbetrag": sum((p["menge"] * p["einzelpreis"] for p in positions), Decimal("0")),
+                "status": "storniert" if rnd.random() < 0.02 else "versendet",
+            })
+        ids = conn.execute(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        positions_total += _insert_chunked(conn, InvoicePosition.__table__, (
+            {**pos, "invoice_id": invoice_id}
+            for invoice_id, positions in zip(ids, position_lists)
+            for pos in positions
+        ))
+    return volumes.invoices, positions_total
+
+
+def generate(conn: Connection, volumes: Volumes, seed: int = 42, months: int = 84) -> dict:
+    """Füllt die Datenbank und gibt die tatsächlich erzeugten Mengen zurück (ohne Commit)."""
+    rnd = random.Random(seed)
+    month_list = _months(months)
+
+    customers = _customers(conn, rnd, volumes.customers)
+    templates = _templates(conn, rnd, volumes.templates)
+    rates = _rates(conn, rnd, month_list)
+    invoices, positions = _invoices(conn, rnd, volumes, customers, month_list)
+
+    conn.execute(insert(InvoiceNumberCounter), [
+        {"uuid": uuid.UUID(int=rnd.getrandbits(128)), "serie": GLOBAL_SERIES, "letzte_nummer": invoices},
+    ])
+    return {
+        "customers": len(customers),
+        "templates": templates,
+        "exchange_rates": rates,
+        "invoices": invoices,
+        "positions": positions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetische Testdaten erzeugen.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor auf 10k/100k/1M")
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--invoices", type=int)
+    parser.add_argument("--positions", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("DATABASE_URL oder --database-url angeben.")
+
+    volumes = Volumes.scaled(args.scale)
+    volumes.customers = args.customers or volumes.customers
+    volumes.invoices = args.invoices or volumes.invoices
+    volumes.positions = args.positions or volumes.positions
+
+    engine = create_engine(args.database_url, future=True)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        counts = generate(conn, volumes, args.seed)
+    with Session(engine) as db:
+        rebuild_revenue_summary(db)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    seconds = time.perf_counter() - start
+    print(", ".join(f"{v} {k}" for k, v in counts.items()) + f" ({seconds:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# scripts/import_exchange_rates.py
+"""Importiert Wechselkurse aus einer lokalen EZB-Datei (CSV oder XML).
+
+    python scripts/import_exchange_rates.py eurofxref-hist.csv
+    python scripts/import_exchange_rates.py eurofxref-hist.xml
+
+Die Datei wird gestreamt; vorhandene (datum, von, nach) werden übersprungen.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.db.session import SessionLocal
+from app.services.exchange_rate_import import import_rates, iter_rate_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EZB-Wechselkurse importieren.")
+    parser.add_argument("path", help="EZB-CSV oder -XML (z.B. eurofxref-hist.csv)")
+    args = parser.parse_args()
+
+    read = 0
+
+    def _counted(rows):
+        nonlocal read
+        for row in rows:
+            read += 1
+            yield row
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        inserted = import_rates(db, _counted(iter_rate_file(args.path)))
+    seconds = time.perf_counter() - start
+    print(f"{read} Kurse gelesen, {inserted} neu, {read - inserted} bereits vorhanden "
+          f"({seconds:.1f}s, {read / seconds if seconds else 0:.0f} Zeilen/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# scripts/import_timesheet.py
+"""Erstellt Rechnungen aus einem Zeiterfassungs-Export (CSV oder Parquet).
+
+    python scripts/import_timesheet.py zeiten-2026-01.csv --year 2026 --month 1            # nur Vorschau
+    python scripts/import_timesheet.py zeiten-2026-01.csv --year 2026 --month 1 --bill     # Sammellauf
+    python scripts/import_timesheet.py zeiten.parquet --year 2026 --month 1 --customer 12 --bill
+    python scripts/import_timesheet.py export.csv --year 2026 --month 1 --sep ";" --decimal "," \\
+        --date-format "%d.%m.%Y" --columns kunde=Kunde,projekt=Projekt,stunden=Dauer,satz=Satz,datum=Datum
+
+Die Datei wird blockweise gelesen und je (Kunde, Projekt, Vorlage, Satz,
+Währung) zu einer Position summiert. Kunden per ID oder exaktem Namen; Vorlagen
+per `vorlage`-Spalte oder Projektname. Mit `datum`-Spalte zählen nur Buchungen
+des Abrechnungsmonats; ihr Format gibt --date-format vor (Standard ISO 8601).
+Zeilen mit unlesbarem Datum oder Stunden werden gezählt und gemeldet.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from app.db.session import SessionLocal
+from app.services.billing_service import DEFAULT_CHUNK_SIZE, run_billing
+from app.services.exchange_rate_service import ExchangeRateMissing
+from app.services.invoice_service import create_invoice_with_positions
+from app.services.reference_data import get_customer
+from app.services.timesheet_import import (
+    CHUNK_ROWS,
+    DATE_FORMATS,
+    DEFAULT_COLUMNS,
+    DEFAULT_DATE_FORMAT,
+    import_timesheet,
+)
+
+
+def _parse_columns(value: str) -> dict[str, str]:
+    columns = {}
+    for pair in value.split(","):
+        internal, _, external = pair.partition("=")
+        if internal.strip() not in DEFAULT_COLUMNS or not external.strip():
+            raise argparse.ArgumentTypeError(
+                f"{pair!r}: erwartet <{'|'.join(DEFAULT_COLUMNS)}>=<Spalte im Export>")
+        columns[internal.strip()] = external.strip()
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeiterfassung aggregieren und abrechnen.")
+    parser.add_argument("path", help="CSV- oder Parquet-Datei")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--month", type=int, required=True)
+    parser.add_argument("--columns", type=_parse_columns, help="Spaltennamen, z.B. kunde=Client,stunden=Hours")
+    parser.add_argument("--sep", default=",", help="CSV-Trennzeichen")
+    parser.add_argument("--decimal", default=".", help="CSV-Dezimalzeichen")
+    parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT,
+                        help="Format der datum-Spalte: ISO8601 oder strftime-Muster, z.B. "
+                             + ", ".join(f for f in DATE_FORMATS if f != "ISO8601").replace("%", "%%"))
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--customer", type=int, help="nur diesen Kunden abrechnen")
+    parser.add_argument("--bill", action="store_true", help="Rechnungen erstellen (sonst nur Vorschau)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rechnungen pro Transaktion")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    monat = f"{args.year:04d}-{args.month:02d}"
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        result = import_timesheet(db, args.path, monat, date_format=args.date_format, columns=args.columns,
+                                  sep=args.sep, decimal=args.decimal, chunk_rows=args.chunk_rows)
+        specs = result.positions
+        if args.customer is not None:
+            specs = {args.customer: specs[args.customer]} if args.customer in specs else {}
+
+        print(f"{result.rows_read} Zeilen gelesen, {result.rows_used} für {monat} verwendet "
+              f"({time.perf_counter() - start:.1f}s)")
+        for kunde_id, positions in sorted(specs.items()):
+            print(f"  Kunde {kunde_id}: {len(positions)} Positionen")
+            if not args.bill:
+                for pos in positions:
+                    print(f"    {pos['menge']:>8} × {pos['einzelpreis']} {pos['waehrung']}  {pos['beschreibung']}")
+        for kunde, stunden in sorted(result.unknown_customers.items()):
+            print(f"  UNBEKANNTER KUNDE {kunde!r}: {stunden:.2f} h nicht abgerechnet")
+        for spalte, anzahl in sorted(result.invalid_rows.items()):
+            beispiele = ", ".join(repr(v) for v in result.invalid_samples.get(spalte, []))
+            print(f"  UNGÜLTIGE {spalte.upper()}: {anzahl} Zeilen nicht verwendet (z.B. {beispiele})")
+        for kunde_id, hinweise in sorted(result.skipped.items()):
+            for hinweis in hinweise:
+                print(f"  Kunde {kunde_id}: ÜBERSPRUNGEN {hinweis}")
+
+        if not args.bill or not specs:
+            return
+        if args.customer is not None:
+            try:
+                invoice = create_invoice_with_positions(db, get_customer(args.customer), args.year, args.month,
+                                                        specs[args.customer])
+            except ExchangeRateMissing as e:
+                raise SystemExit(str(e))
+            print(f"Rechnung {invoice.nummer} erstellt")
+            return
+        billing = run_billing(db, args.year, args.month, specs, chunk_size=args.chunk_size)
+
+    print(f"{len(billing.created)} Rechnungen erstellt in {billing.seconds:.2f}s")
+    for kunde_id, fehler in billing.failed:
+        print(f"  Kunde {kunde_id}: FEHLER {fehler}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# scripts/invoice_status.py
+"""Ändert den Status einer Rechnung, z.B. für ein Storno.
+
+    python scripts/invoice_status.py 00042 storniert
+    python scripts/invoice_status.py 00042 versendet     # Storno zurücknehmen
+
+Die Umsatzübersicht wird in derselben Transaktion fortgeschrieben: Wechselt
+die Rechnung zwischen umsatzwirksam und nicht umsatzwirksam (Entwurf,
+storniert), wird ihr Betrag aus- bzw. wieder eingebucht.
+"""
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.db.models import Invoice
+from app.services.invoice_service import set_invoice_status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rechnungsstatus ändern.")
+    parser.add_argument("nummer", help="Rechnungsnummer")
+    parser.add_argument("status", help="neuer Status, z.B. versendet, bezahlt, storniert")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        # Zeile sperren, damit parallele Statuswechsel nicht doppelt buchen
+        invoice = db.execute(
+            select(Invoice).where(Invoice.nummer == args.nummer).with_for_update()
+        ).scalar_one_or_none()
+        if invoice is None:
+            raise SystemExit(f"Unbekannte Rechnung: {args.nummer}")
+        alt = invoice.status
+        set_invoice_status(db, invoice, args.status)
+        print(f"Rechnung {args.nummer}: {alt} -> {invoice.status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# scripts/job_worker.py
+"""Startet Hintergrund-Worker für die Job-Queue (PDF-Erzeugung usw.).
+
+    python scripts/job_worker.py                 # ein Worker, läuft dauerhaft
+    python scripts/job_worker.py --processes 4   # vier parallele Worker
+    python scripts/job_worker.py --once          # Queue abarbeiten und beenden
+
+Auf Postgres verteilen sich beliebig viele Worker (auch auf mehreren
+Rechnern) per SKIP LOCKED auf die Jobs.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+
+from app.services.job_queue import run_worker
+
+
+def _run(once: bool):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    run_worker(once=once)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job-Worker starten.")
+    parser.add_argument("--processes", type=int, default=1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--once", action="store_true", help="beenden, sobald die Queue leer ist")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _run(args.once)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=_run, args=(args.once,), name=f"job-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for p in workers:
+        p.start()
+    try:
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        for p in workers:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()
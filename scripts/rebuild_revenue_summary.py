@@ -0,0 +1,25 @@
+# scripts/rebuild_revenue_summary.py
+"""Baut die Umsatzübersicht (revenue_summary) komplett aus den Rechnungen neu auf.
+
+    python scripts/rebuild_revenue_summary.py
+
+Im Normalbetrieb wird die Übersicht beim Buchen fortgeschrieben; der Neuaufbau
+ist für Korrekturen direkt in der Datenbank oder nach Datenimporten gedacht.
+"""
+from __future__ import annotations
+
+import time
+
+from app.db.session import SessionLocal
+from app.services.revenue_service import rebuild_revenue_summary
+
+
+def main():
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        count = rebuild_revenue_summary(db)
+    print(f"revenue_summary: {count} Zeilen neu aufgebaut ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
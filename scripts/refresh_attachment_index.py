@@ -0,0 +1,29 @@
+# scripts/refresh_attachment_index.py
+"""Gleicht den lokalen Anhangsindex mit dem Anhangsordner ab.
+
+    python scripts/refresh_attachment_index.py          # nur geänderte Verzeichnisse
+    python scripts/refresh_attachment_index.py --full   # alle Verzeichnisse neu lesen
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.services.attachment_index import AttachmentIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anhangsindex aktualisieren.")
+    parser.add_argument("--full", action="store_true",
+                        help="alle Verzeichnisse neu lesen (findet auch überschriebene Dateien)")
+    args = parser.parse_args()
+
+    index = AttachmentIndex()
+    start = time.perf_counter()
+    scanned = index.refresh(full=args.full)
+    print(f"{index.base_dir}: {scanned} Verzeichnisse neu gelesen, "
+          f"{len(index)} Anhänge im Index ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
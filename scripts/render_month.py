@@ -0,0 +1,53 @@
+# scripts/render_month.py
+"""Rendert alle Rechnungen eines Monats parallel als PDF.
+
+    python scripts/render_month.py --month 2026-01 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from app.db.session import SessionLocal
+from app.services.attachment_bundler import AttachmentReaders, bundle_invoice_pdf
+from app.services.invoice_snapshot import load_month_payloads
+from app.services.pdf_pool import get_render_pool, render_invoices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDFs für alle Rechnungen eines Monats erzeugen.")
+    parser.add_argument("--month", required=True, help="Monat im Format YYYY-MM")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Render-Prozesse")
+    parser.add_argument("--bundle", action="store_true",
+                        help="zusätzlich <nummer>_mit_anlagen.pdf inkl. Positions-Anhängen schreiben")
+    args = parser.parse_args()
+
+    # aus den Snapshots: eine Abfrage, keine Joins
+    with SessionLocal() as db:
+        invoices = load_month_payloads(db, args.month)
+
+    attachments = {inv["nummer"]: [p["attachment_path"] for p in inv["positions"]] for inv in invoices}
+
+    start = time.perf_counter()
+    ok = failed = 0
+    # ein gemeinsamer Reader-Cache: mehrfach referenzierte Anhänge werden nur einmal geparst
+    with AttachmentReaders() as readers:
+        for result in render_invoices(invoices, executor=get_render_pool(args.workers)):
+            if result.error:
+                failed += 1
+                print(f"{result.nummer}: FEHLER {result.error}")
+                continue
+            ok += 1
+            print(f"{result.nummer}: {result.path}")
+
+            if args.bundle and any(attachments[result.nummer]):
+                bundle_path = os.path.splitext(result.path)[0] + "_mit_anlagen.pdf"
+                skipped = bundle_invoice_pdf(result.path, attachments[result.nummer], bundle_path, readers)
+                print(f"{result.nummer}: {bundle_path}" + (f" (übersprungen: {skipped})" if skipped else ""))
+    seconds = time.perf_counter() - start
+    print(f"{ok} PDFs erzeugt, {failed} fehlgeschlagen, {seconds:.2f}s ({ok / seconds if seconds else 0:.1f} PDFs/s)")
+
+
+if __name__ == "__main__":
+    main()
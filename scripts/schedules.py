@@ -0,0 +1,140 @@
+# scripts/schedules.py
+"""Serienrechnungen verwalten und fällige Perioden abrechnen.
+
+    python scripts/schedules.py add --customer 12 --name "Wartung" --templates 4,5 --start 2026-01
+    python scripts/schedules.py add --customer 12 --name "Lizenz" --templates 7 --start 2026-01 --interval 12
+    python scripts/schedules.py list
+    python scripts/schedules.py run --dry-run        # nur anzeigen, was fällig ist
+    python scripts/schedules.py run                  # bis einschließlich aktuellem Monat, holt Verpasstes nach
+    python scripts/schedules.py run --until 2026-03
+    python scripts/schedules.py deactivate 3
+
+`run` ist wiederholbar (z.B. täglich per Cron): bereits abgerechnete Perioden
+werden übersprungen, ein eindeutiger Index verhindert doppelte Rechnungen.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.db.session import SessionLocal
+from app.db.models import Customer, InvoiceSchedule, InvoiceSchedulePosition, PositionTemplate
+from app.services.billing_service import DEFAULT_CHUNK_SIZE
+from app.services.schedule_service import run_schedules
+
+
+def _month(value: str) -> str:
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", value):
+        raise argparse.ArgumentTypeError(f"{value!r}: erwartet YYYY-MM")
+    return value
+
+
+def _parse_ids(value: str) -> list[int]:
+    try:
+        ids = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r}: erwartet Vorlagen-IDs, z.B. 4,5")
+    if not ids:
+        raise argparse.ArgumentTypeError("mindestens eine Vorlage angeben – sonst entstehen leere Rechnungen")
+    return ids
+
+
+def _add(db, args):
+    if db.get(Customer, args.customer) is None:
+        raise SystemExit(f"Unbekannter Kunde: {args.customer}")
+    known = set(db.execute(select(PositionTemplate.id).where(PositionTemplate.id.in_(args.templates))).scalars())
+    missing = [tid for tid in args.templates if tid not in known]
+    if missing:
+        raise SystemExit(f"Unbekannte Vorlagen: {missing}")
+    if args.end and args.end < args.start:
+        raise SystemExit("--end liegt vor --start")
+
+    schedule = InvoiceSchedule(
+        kunde_id=args.customer,
+        name=args.name,
+        intervall_monate=args.interval,
+        start_monat=args.start,
+        end_monat=args.end,
+        naechste_periode=args.start,
+        aktiv=True,
+        positions=[InvoiceSchedulePosition(template_id=tid) for tid in args.templates],
+    )
+    db.add(schedule)
+    db.commit()
+    print(f"Serie {schedule.id} angelegt: Kunde {args.customer}, ab {args.start}, alle {args.interval} Monat(e)")
+
+
+def _list(db, args):
+    schedules = db.execute(
+        select(InvoiceSchedule)
+        .options(selectinload(InvoiceSchedule.positions))
+        .order_by(InvoiceSchedule.kunde_id, InvoiceSchedule.id)
+    ).scalars().all()
+    for s in schedules:
+        status = "aktiv" if s.aktiv else "inaktiv"
+        print(f"{s.id:>5}  Kunde {s.kunde_id:<6} {s.name:<30} alle {s.intervall_monate:>2} M.  "
+              f"{s.start_monat}–{s.end_monat or 'offen'}  nächste {s.naechste_periode}  "
+              f"Vorlagen {','.join(str(p.template_id) for p in s.positions)}  {status}")
+
+
+def _deactivate(db, args):
+    schedule = db.get(InvoiceSchedule, args.id)
+    if schedule is None:
+        raise SystemExit(f"Unbekannte Serie: {args.id}")
+    schedule.aktiv = False
+    db.commit()
+    print(f"Serie {args.id} deaktiviert")
+
+
+def _run(db, args):
+    result = run_schedules(db, args.until, dry_run=args.dry_run, chunk_size=args.chunk_size)
+    if args.dry_run:
+        print(f"{len(result.due)} Perioden fällig bis {result.bis_monat}")
+        for schedule_id, monat in result.due:
+            print(f"  Serie {schedule_id}: {monat}")
+        return
+    print(f"Bis {result.bis_monat}: {len(result.due)} fällig, {len(result.created)} Rechnungen erstellt "
+          f"in {result.seconds:.2f}s")
+    for schedule_id, monat, nummer in result.created:
+        print(f"  Serie {schedule_id} {monat}: {nummer}")
+    for schedule_id, monat, fehler in result.failed:
+        print(f"  Serie {schedule_id} {monat}: FEHLER {fehler}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serienrechnungen verwalten und abrechnen.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Serie anlegen")
+    add.add_argument("--customer", type=int, required=True)
+    add.add_argument("--name", required=True)
+    add.add_argument("--templates", type=_parse_ids, required=True, help="Vorlagen-IDs, kommagetrennt")
+    add.add_argument("--start", type=_month, required=True, help="erste Periode (YYYY-MM)")
+    add.add_argument("--end", type=_month, help="letzte Periode (YYYY-MM), sonst unbefristet")
+    add.add_argument("--interval", type=int, default=1, choices=[1, 2, 3, 6, 12], help="Monate je Periode")
+    add.set_defaults(handler=_add)
+
+    commands.add_parser("list", help="Serien anzeigen").set_defaults(handler=_list)
+
+    deactivate = commands.add_parser("deactivate", help="Serie stoppen")
+    deactivate.add_argument("id", type=int)
+    deactivate.set_defaults(handler=_deactivate)
+
+    run = commands.add_parser("run", help="fällige Perioden abrechnen")
+    run.add_argument("--until", type=_month, help="bis einschließlich (YYYY-MM), Standard: aktueller Monat")
+    run.add_argument("--dry-run", action="store_true")
+    run.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    run.set_defaults(handler=_run)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    with SessionLocal() as db:
+        args.handler(db, args)
+
+
+if __name__ == "__main__":
+    main()